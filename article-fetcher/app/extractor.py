@@ -0,0 +1,139 @@
+import asyncio
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Union
+from newsplease import NewsPlease
+
+WARM_UP_HTML = "<html><head><title>Warm up</title></head><body><article><p>Warm up.</p></article></body></html>"
+
+def warm_up() -> bool:
+    # Runs once in every worker so the first real article does not pay for lazy imports
+    NewsPlease.from_html(WARM_UP_HTML, url="http://localhost/", fetch_images=False)
+    return True
+
+def extract_article(html: str, url: str) -> Union[Dict[str, Union[str, None]], None]:
+    article = NewsPlease.from_html(html, url=url, fetch_images=False)
+    if article is None:
+        return None
+    # Only plain values cross the process boundary
+    return {
+        "maintext": article.maintext,
+        "title": article.title,
+        "date_publish": article.date_publish.isoformat() if article.date_publish else None,
+    }
+
+class ArticleExtractor:
+    """
+    Runs newsplease extraction off the event loop.
+
+    The "process" backend spreads the CPU-bound lxml work over a pool of warmed-up
+    worker processes, so extraction is no longer serialized on the GIL. The pool is
+    replaced after `recycle_after` documents per worker to bound lxml memory growth,
+    and also after a document times out; that pool's workers are terminated, since
+    the stuck one would otherwise keep a core and its memory until it finished.
+    At most `workers` documents are handed to a pool at once, so the timeout runs
+    from when a worker picks the document up rather than while it waits in a burst.
+    The "thread" backend keeps the previous in-process behaviour.
+    """
+    def __init__(self):
+        self.backend = os.getenv('ARTICLE_EXTRACTOR_BACKEND') or 'process'
+        self.workers = int(os.getenv('ARTICLE_EXTRACTOR_WORKERS') or os.cpu_count() or 1)
+        self.timeout = float(os.getenv('ARTICLE_EXTRACTOR_TIMEOUT_SECONDS') or 30)
+        self.recycle_after = int(os.getenv('ARTICLE_EXTRACTOR_RECYCLE_AFTER') or 200)
+        self.executor: Union[Executor, None] = None
+        # One slot per worker of the current pool; replaced along with the pool
+        self._slots: Union[asyncio.Semaphore, None] = None
+        # Worker processes of pools already replaced, kept until those pools are collected
+        self._retired_processes = weakref.WeakKeyDictionary()
+        self._documents = 0
+        self.in_flight = 0
+
+    def _create_executor(self) -> Executor:
+        if self.backend == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers)
+        if self.backend != "process":
+            raise ValueError("Unknown extractor backend: " + self.backend)
+        # Spawned rather than forked: the parent runs an event loop and httpx threads
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _warm(self, executor: Executor):
+        for future in [executor.submit(warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    async def start(self):
+        self.executor = self._create_executor()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._documents = 0
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._warm, self.executor)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def _recycle(self, terminate: bool = False):
+        # Work already handed to the old pool still completes unless `terminate` is set,
+        # in which case it fails along with the hung document; new work goes to the fresh one
+        retired = self.executor
+        retired_slots = self._slots
+        # Read before shutdown(), which drops the pool's reference to its processes
+        self._retired_processes[retired] = list((getattr(retired, "_processes", None) or {}).values())
+        self.executor = self._create_executor()
+        self._documents = 0
+        # Start warming the replacement right away without blocking the caller; its slots
+        # open as workers finish warming, so no document's timeout runs during start-up
+        self._slots = asyncio.Semaphore(0)
+        for _ in range(self.workers):
+            warming = asyncio.wrap_future(self.executor.submit(warm_up))
+            warming.add_done_callback(lambda _, slots=self._slots: slots.release())
+        retired.shutdown(wait=False)
+        if terminate:
+            self._terminate(retired)
+        # Wake one document still waiting for the retired pool; each one that wakes finds
+        # the pool replaced and hands its slot on to the next before moving over
+        retired_slots.release()
+
+    def _terminate(self, retired: Executor):
+        for process in self._retired_processes.pop(retired, []):
+            process.terminate()
+
+    async def _acquire(self):
+        # Returns the pool the document runs on together with the slot it holds there
+        while True:
+            executor, slots = self.executor, self._slots
+            await slots.acquire()
+            if executor is self.executor:
+                return executor, slots
+            slots.release()
+
+    async def extract(self, html: str, url: str):
+        if self.executor is None:
+            await self.start()
+        if self.backend == "process" and self._documents >= self.recycle_after * self.workers:
+            self._recycle()
+        self._documents += 1
+        loop = asyncio.get_event_loop()
+        self.in_flight += 1
+        try:
+            executor, slots = await self._acquire()
+            try:
+                future = loop.run_in_executor(executor, extract_article, html, url)
+                # Shielded so a timeout leaves the pool's future alone; terminating the pool
+                # then fails it rather than tripping over a cancelled one
+                return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                future.add_done_callback(lambda future: future.exception())
+                # Only the pool the document ran on is suspect; if it was already replaced
+                # (by recycling or an earlier timeout) the replacement is left alone
+                if self.backend == "process" and executor is self.executor:
+                    self._recycle(terminate=True)
+                elif self.backend == "process":
+                    self._terminate(executor)
+                raise
+            finally:
+                slots.release()
+        finally:
+            self.in_flight -= 1
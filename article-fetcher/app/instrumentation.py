@@ -0,0 +1,225 @@
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+
+# Seconds, from tokenizing a tweet to generating a long summary
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+def _label_set(labels: Dict[str, Any]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: LabelSet) -> str:
+    if len(labels) == 0:
+        return ""
+    escaped = (key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    """
+    Process-wide counters, gauges and histograms, rendered in the Prometheus text
+    format by the service's /metrics endpoint.
+
+    Updates are cheap and safe from executor threads. Callback gauges are read at
+    scrape time, for values that are easier to look up than to keep current
+    (executor queue depth, cache statistics, memory).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self._callbacks: List[Tuple[str, str, LabelSet, Callable[[], float]]] = []
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_set(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_set(labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = TIME_BUCKETS, **labels):
+        key = _label_set(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        # Every hot-path stage lands in one histogram, told apart by the stage label
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - started_at, stage=stage, **labels)
+
+    def gauge(self, name: str, read: Callable[[], float], kind: str = "gauge", **labels):
+        self._callbacks.append((name, kind, _label_set(labels), read))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append("# TYPE " + name + " counter")
+                lines.extend(name + _format_labels(labels) + " " + repr(float(value)) for labels, value in series.items())
+            for name, series in sorted(self._gauges.items()):
+                lines.append("# TYPE " + name + " gauge")
+                lines.extend(name + _format_labels(labels) + " " + repr(float(value)) for labels, value in series.items())
+            for name, series in sorted(self._histograms.items()):
+                lines.append("# TYPE " + name + " histogram")
+                for labels, histogram in series.items():
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(name + "_bucket" + _format_labels(labels + (("le", repr(float(bound))),)) + " " + str(count))
+                    lines.append(name + "_bucket" + _format_labels(labels + (("le", "+Inf"),)) + " " + str(histogram.count))
+                    lines.append(name + "_sum" + _format_labels(labels) + " " + repr(histogram.sum))
+                    lines.append(name + "_count" + _format_labels(labels) + " " + str(histogram.count))
+            callbacks = list(self._callbacks)
+        declared = set()
+        for name, kind, labels, read in callbacks:
+            try:
+                value = float(read())
+            except Exception:
+                continue
+            if name not in declared:
+                lines.append("# TYPE " + name + " " + kind)
+                declared.add(name)
+            lines.append(name + _format_labels(labels) + " " + repr(value))
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def resident_memory_bytes() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Peak rather than current outside Linux; ru_maxrss is in kilobytes there too
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+metrics.gauge("process_resident_memory_bytes", resident_memory_bytes)
+
+def memory_breakdown() -> Dict[str, int]:
+    # Shared pages are the ones forked workers still have in common with the parent
+    # (model weights, when serving with several workers); private pages are this
+    # process's own. pss splits the shared pages evenly among the processes mapping them.
+    fields = {"Rss:": "rss", "Pss:": "pss", "Shared_Clean:": "shared", "Shared_Dirty:": "shared", "Private_Clean:": "private", "Private_Dirty:": "private"}
+    breakdown = {"rss": 0, "pss": 0, "shared": 0, "private": 0}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) > 1 and parts[0] in fields:
+                    breakdown[fields[parts[0]]] += int(parts[1]) * 1024
+    except OSError:
+        # Not Linux (or older than 4.14): everything counts as private
+        breakdown["rss"] = breakdown["private"] = int(resident_memory_bytes())
+        breakdown["pss"] = breakdown["rss"]
+    return breakdown
+
+for _kind in ("shared", "private", "pss"):
+    metrics.gauge("process_" + _kind + "_memory_bytes", lambda kind=_kind: memory_breakdown()[kind])
+
+def record_model_memory(name: str, model: Any):
+    # torch modules only; exported ONNX graphs keep their weights inside onnxruntime
+    parameters = getattr(model, "parameters", None)
+    if not callable(parameters):
+        return
+    metrics.set("model_parameter_bytes", sum(p.numel() * p.element_size() for p in parameters()), model=name)
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at a fixed interval and counts them in the
+    folded format flamegraph.pl and speedscope read ("frame;frame;frame count").
+
+    Inference runs on executor threads rather than the request's own, so all
+    threads are sampled; work from concurrent requests shows up in the profile too.
+    """
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(code.co_name + " (" + os.path.basename(code.co_filename) + ":" + str(frame.f_lineno) + ")")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(stack + " " + str(count) + "\n" for stack, count in self.samples.most_common())
+
+async def metrics_middleware(request: Request, call_next):
+    profile = (os.getenv('PROFILING_ENABLED') or 'false') == 'true' and (
+        request.query_params.get('profile') == 'true' or request.headers.get('x-profile') == 'true'
+    )
+    profiler = None
+    if profile:
+        profiler = SamplingProfiler(float(os.getenv('PROFILING_INTERVAL_MS') or 5) / 1000)
+        profiler.start()
+    started_at = time.perf_counter()
+    try:
+        response = await call_next(request)
+        if profiler is not None:
+            # Drain the body so streamed responses are profiled to the end
+            async for _ in response.body_iterator:
+                pass
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    # Unknown paths are folded together so scanners cannot blow up the label set
+    path = request.url.path if response.status_code != 404 else "other"
+    metrics.observe("http_request_duration_seconds", time.perf_counter() - started_at, path=path)
+    metrics.inc("http_requests_total", path=path, status=response.status_code)
+    if profiler is not None:
+        # The profile replaces the response body; the original status is kept in a header
+        return PlainTextResponse(profiler.folded(), headers={"x-profiled-status": str(response.status_code)})
+    return response
+
+def metrics_response() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
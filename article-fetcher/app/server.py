@@ -1,17 +1,28 @@
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+import json
 import os
 from typing import List, Union
 from pydantic import BaseModel
 from fetcher import ArticleFetcher
+from instrumentation import metrics_middleware, metrics_response
 
 # Pydantic model for the request data
 class ArticleFetcherRequest(BaseModel):
     urls: List[Union[str, None]]
 
-app = FastAPI()
-
 article_fetcher = ArticleFetcher()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The pooled HTTP client lives for the whole process
+    await article_fetcher.start()
+    yield
+    await article_fetcher.close()
+
+app = FastAPI(lifespan=lifespan)
+
 async def auth_middleware(request: Request, call_next):
     auth_token = request.headers.get('auth-token')
     if os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
@@ -19,12 +30,27 @@ async def auth_middleware(request: Request, call_next):
     response = await call_next(request)
     return response
 
+# Registered first so auth wraps it and unauthenticated requests are never profiled
+app.middleware('http')(metrics_middleware)
 app.middleware('http')(auth_middleware)
 
+def wants_stream(request: Request, stream: bool) -> bool:
+    return stream or "application/x-ndjson" in request.headers.get('accept', '')
+
 @app.post("/")
-async def handle_fetch_article_request(request_data: ArticleFetcherRequest):
+async def handle_fetch_article_request(request_data: ArticleFetcherRequest, request: Request, stream: bool = False):
+    if wants_stream(request, stream):
+        # One NDJSON record per URL as soon as it is fetched; errors stay inline
+        async def records():
+            async for index, (result, cache, error) in article_fetcher.stream_articles(request_data.urls):
+                yield json.dumps({"index": index, "result": result, "cache": cache, "error": error}) + "\n"
+        return StreamingResponse(records(), media_type="application/x-ndjson")
     try:
-        result = await article_fetcher.fetch_articles(urls=request_data.urls)
-        return {"status": "success", "result": result}
+        results = await article_fetcher.fetch_articles(urls=request_data.urls)
+        return {"status": "success", "result": [result[0] for result in results], "cache": [result[1] for result in results]}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics")
+async def handle_metrics_request():
+    return metrics_response()
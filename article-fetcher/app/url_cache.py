@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Hosts whose only job is to redirect somewhere else
+SHORTENER_HOSTS = {
+    "t.co", "bit.ly", "buff.ly", "dlvr.it", "ow.ly", "tinyurl.com", "goo.gl",
+    "trib.al", "lnkd.in", "fb.me", "ift.tt", "shorturl.at", "rebrand.ly", "is.gd",
+}
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src",
+    "ref_url", "cmpid", "ocid", "smid", "smtyp", "amp", "outputtype", "__twitter_impression",
+}
+
+CANONICAL_LINK = re.compile(
+    r"<link[^>]+rel=[\"']canonical[\"'][^>]*>",
+    re.IGNORECASE,
+)
+HREF = re.compile(r"href=[\"']([^\"']+)[\"']", re.IGNORECASE)
+
+def is_shortener(url: str) -> bool:
+    return (urlsplit(url).hostname or "").lower() in SHORTENER_HOSTS
+
+def canonicalize_url(url: str) -> str:
+    """
+    Maps the many spellings of one article to a single cache key: lowercases the
+    host, drops default ports, fragments and tracking parameters, sorts the rest of
+    the query string and folds AMP variants onto the regular page.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    path = parts.path or "/"
+
+    # Google's AMP cache: https://www.google.com/amp/s/example.com/story -> https://example.com/story
+    if host.endswith("google.com") and path.startswith("/amp/"):
+        inner = path[len("/amp/"):]
+        if inner.startswith("s/"):
+            inner = inner[2:]
+        return canonicalize_url("https://" + inner)
+
+    if host.startswith("amp."):
+        host = host[len("amp."):]
+    if host.startswith("www."):
+        host = host[len("www."):]
+    path = re.sub(r"/amp/?$", "/", path)
+    path = re.sub(r"\.amp(\.html)?$", "", path)
+    path = re.sub(r"/amp\.html$", "/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    netloc = host
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        netloc = host + ":" + str(parts.port)
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    # http and https spellings of the same article share one entry
+    return urlunsplit(("https" if scheme in ("http", "https") else scheme, netloc, path, urlencode(query), ""))
+
+def find_canonical_link(html: str) -> Optional[str]:
+    match = CANONICAL_LINK.search(html)
+    if match is None:
+        return None
+    href = HREF.search(match.group(0))
+    if href is None or not href.group(1).startswith("http"):
+        return None
+    return href.group(1)
+
+class ArticleCache:
+    """
+    Extracted articles keyed by canonical URL, with the validators needed to
+    revalidate them through conditional GETs.
+
+    Entries younger than `fresh_seconds` are served as-is; older ones are handed
+    back as stale so the caller can revalidate them. The in-memory tier is an LRU
+    bounded by `max_entries`; the optional SQLite tier at `disk_path` survives
+    restarts.
+    """
+    def __init__(self, max_entries: int = 5000, fresh_seconds: float = 3600, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.fresh_seconds = fresh_seconds
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk_path = disk_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv('ARTICLE_CACHE_MAX_ENTRIES') or 5000),
+            fresh_seconds=float(os.getenv('ARTICLE_CACHE_FRESH_SECONDS') or 3600),
+            disk_path=os.getenv('ARTICLE_CACHE_DISK_PATH') or None,
+        )
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Opened on first use in each process: SQLite connections must not cross fork(),
+        # and ml-pipeline's serving workers are forked after the fetcher is built
+        if not self.disk_path:
+            return None
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS articles (key TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def __len__(self) -> int:
+        # Entries in the in-memory tier
+        return len(self._entries)
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["stored_at"] <= self.fresh_seconds
+
+    def get(self, key: str) -> Union[Dict, None]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            db = self._connection()
+            if db is not None:
+                row = db.execute("SELECT entry FROM articles WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = json.loads(row[0])
+                    self._remember(key, entry)
+                    return entry
+            return None
+
+    def set(self, key: str, maintext: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict:
+        entry = {
+            "maintext": maintext,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+        }
+        with self._lock:
+            self._remember(key, entry)
+            db = self._connection()
+            if db is not None:
+                db.execute("INSERT OR REPLACE INTO articles (key, entry) VALUES (?, ?)", (key, json.dumps(entry)))
+                db.commit()
+        return entry
+
+    def touch(self, key: str, entry: Dict):
+        # A 304 proves the stored text is still current
+        self.set(key, entry["maintext"], entry.get("etag"), entry.get("last_modified"))
+
+    def _remember(self, key: str, entry: Dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
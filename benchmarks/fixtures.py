@@ -0,0 +1,111 @@
+import random
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import List
+from benchmarks.workloads import make_text
+
+ARTICLE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<title>{title}</title>
+<meta property="og:title" content="{title}">
+<meta property="article:published_time" content="2024-01-15T08:30:00+07:00">
+</head>
+<body>
+<nav><a href="/">Home</a> <a href="/news">News</a> <a href="/sports">Sports</a></nav>
+<article>
+<h1>{title}</h1>
+{paragraphs}
+</article>
+<footer>Copyright Benchmark News</footer>
+</body>
+</html>
+"""
+
+def render_article(seed: int) -> bytes:
+    rng = random.Random(seed)
+    paragraphs = "\n".join("<p>" + make_text(rng, rng.randint(40, 120)) + "</p>" for _ in range(rng.randint(6, 16)))
+    return ARTICLE_TEMPLATE.format(title=make_text(rng, 8).rstrip("."), paragraphs=paragraphs).encode("utf-8")
+
+def render_images() -> List[bytes]:
+    # Tweet-image shapes: a large photo with no text, a meme with captions and a screenshot of text
+    from PIL import Image, ImageDraw
+    rng = random.Random(0)
+    images = []
+
+    photo = Image.effect_noise((1600, 1200), 64).convert("RGB")
+    images.append(photo)
+
+    meme = Image.new("RGB", (1080, 1080), (90, 120, 160))
+    draw = ImageDraw.Draw(meme)
+    draw.ellipse((240, 240, 840, 840), fill=(220, 180, 140))
+    draw.text((80, 60), make_text(rng, 6).upper(), fill=(255, 255, 255))
+    draw.text((80, 980), make_text(rng, 6).upper(), fill=(255, 255, 255))
+    images.append(meme)
+
+    screenshot = Image.new("RGB", (1170, 2532), (255, 255, 255))
+    draw = ImageDraw.Draw(screenshot)
+    for line in range(60):
+        draw.text((40, 80 + line * 40), make_text(rng, 10), fill=(20, 20, 20))
+    images.append(screenshot)
+
+    encoded = []
+    for image in images:
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        encoded.append(buffer.getvalue())
+    return encoded
+
+class FixtureServer:
+    """
+    Local HTTP server standing in for news sites and image hosts.
+
+    `/article/<id>` returns a generated news page (deterministic per id) and
+    `/image/<id>.png` one of a few pre-rendered tweet-style images. Runs on a
+    background thread for the duration of a benchmark.
+    """
+    def __init__(self):
+        self.images = render_images()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path.startswith("/article/"):
+                    body = render_article(zlib.crc32(self.path.encode("utf-8")))
+                    content_type = "text/html; charset=utf-8"
+                elif self.path.startswith("/image/"):
+                    body = server.images[zlib.crc32(self.path.encode("utf-8")) % len(server.images)]
+                    content_type = "image/png"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = "http://127.0.0.1:" + str(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,95 @@
+import os
+import shutil
+from benchmarks.workloads import TAGS, WORDS
+
+# Tiny random-weight stand-ins with the same architecture family and file layout
+# as the production models, so loading, tokenization, batching and generation
+# run the real code paths in seconds.
+TINY_BERT = dict(hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=128, max_position_embeddings=512)
+TINY_T5 = dict(d_model=64, d_kv=16, d_ff=128, num_layers=2, num_heads=4)
+
+def _corpus():
+    return [" ".join(WORDS), " ".join(TAGS), "This example is {}."] * 20
+
+def _wordpiece(special_tokens, single, pair=None, decoder=False):
+    from tokenizers import Tokenizer, decoders, models, normalizers, pre_tokenizers, processors, trainers
+    tokenizer = Tokenizer(models.WordPiece(unk_token=special_tokens[2]))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.train_from_iterator(_corpus(), trainers.WordPieceTrainer(vocab_size=1000, special_tokens=special_tokens))
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single=single,
+        pair=pair,
+        special_tokens=[(token, tokenizer.token_to_id(token)) for token in special_tokens if token in single + (pair or "")],
+    )
+    if decoder:
+        tokenizer.decoder = decoders.WordPiece()
+    return tokenizer
+
+def _bert_tokenizer():
+    from transformers import BertTokenizerFast
+    tokenizer = _wordpiece(["[PAD]", "[SEP]", "[UNK]", "[CLS]", "[MASK]"], "[CLS] $A [SEP]", "[CLS] $A [SEP] $B:1 [SEP]:1", decoder=True)
+    return BertTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]", cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]", model_max_length=512)
+
+def _sequence_classifier(path: str, **config):
+    from transformers import BertConfig, BertForSequenceClassification
+    tokenizer = _bert_tokenizer()
+    model = BertForSequenceClassification(BertConfig(vocab_size=tokenizer.vocab_size, **TINY_BERT, **config))
+    model.save_pretrained(path, safe_serialization=True)
+    tokenizer.save_pretrained(path)
+
+def build_reranker(path: str):
+    _sequence_classifier(path, num_labels=1)
+    # Same size as the full model here; only the cascade's plumbing is measured
+    _sequence_classifier(os.path.join(path, "first_stage"), num_labels=1)
+
+def build_classifier(path: str):
+    _sequence_classifier(path, num_labels=3, id2label={0: "entailment", 1: "neutral", 2: "contradiction"}, label2id={"entailment": 0, "neutral": 1, "contradiction": 2})
+
+def build_summarizer(path: str):
+    from transformers import PreTrainedTokenizerFast, T5Config, T5ForConditionalGeneration
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=_wordpiece(["<pad>", "</s>", "<unk>"], "$A </s>", decoder=True),
+        unk_token="<unk>",
+        pad_token="<pad>",
+        eos_token="</s>",
+        model_max_length=512,
+    )
+    model = T5ForConditionalGeneration(T5Config(vocab_size=tokenizer.vocab_size, decoder_start_token_id=0, pad_token_id=0, eos_token_id=1, **TINY_T5))
+    model.save_pretrained(path, safe_serialization=True)
+    tokenizer.save_pretrained(path)
+
+def build_image_recognition(path: str):
+    from transformers import BlipConfig, BlipForConditionalGeneration, BlipImageProcessor, BlipProcessor
+    tokenizer = _bert_tokenizer()
+    text_config = dict(vocab_size=tokenizer.vocab_size, hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=128, encoder_hidden_size=64,
+                       bos_token_id=tokenizer.cls_token_id, sep_token_id=tokenizer.sep_token_id, pad_token_id=tokenizer.pad_token_id)
+    vision_config = dict(hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=128, image_size=384, patch_size=16)
+    caption_path = os.path.join(path, "caption")
+    model = BlipForConditionalGeneration(BlipConfig(text_config=text_config, vision_config=vision_config))
+    model.save_pretrained(caption_path, safe_serialization=True)
+    BlipProcessor(image_processor=BlipImageProcessor(), tokenizer=tokenizer).save_pretrained(caption_path)
+
+    # EasyOCR checks its weight files against fixed checksums, so random weights are
+    # not an option; the real detector and recognizer (~100MB) are downloaded once.
+    import easyocr
+    easyocr.Reader(['en'], gpu=False, model_storage_directory=os.path.join(path, "easyocr"), verbose=False)
+
+BUILDERS = {
+    "ml-reranker": build_reranker,
+    "ml-zero-shot-classifier": build_classifier,
+    "ml-summarizer": build_summarizer,
+    "image-recognition-v2": build_image_recognition,
+}
+
+def ensure_model(service: str, path: str):
+    # Built once per cache directory; a partial build is discarded and retried
+    builder = BUILDERS.get(service)
+    marker = os.path.join(path, ".complete")
+    if builder is None or os.path.exists(marker):
+        return
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    builder(path)
+    open(marker, "w").close()
@@ -0,0 +1,158 @@
+"""
+Runs the service benchmarks and compares them against a stored baseline.
+
+    python -m benchmarks.run                          # every service
+    python -m benchmarks.run ml-reranker --concurrency 1,8
+    python -m benchmarks.run --env RERANKER_BATCH_SIZE=64
+    python -m benchmarks.run --update-baseline        # accept the current numbers
+
+Each service runs in its own subprocess (the services all ship a top-level
+`processors` package, so they cannot share an interpreter). Exits non-zero when
+any metric regresses past `--tolerance` relative to the baseline.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+from benchmarks.service import SERVICES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(REPO_ROOT, "benchmarks")
+
+# (metric, True when higher is better)
+METRICS = [
+    ("throughput", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("peak_rss_mb", False),
+]
+
+def run_service(service: str, concurrency: str, requests: int, model_cache: str, env_overrides: Dict[str, str]) -> Dict[str, Any]:
+    workdir = os.path.join(model_cache, service)
+    os.makedirs(workdir, exist_ok=True)
+    env = dict(os.environ)
+    env.update(env_overrides)
+    env["PYTHONPATH"] = os.pathsep.join([REPO_ROOT, os.path.join(REPO_ROOT, service, "app")])
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as output:
+        output_path = output.name
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.service", service, "--concurrency", concurrency, "--requests", str(requests), "--output", output_path],
+            cwd=workdir,
+            env=env,
+            check=True,
+        )
+        with open(output_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(output_path)
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for service, result in results.items():
+        for level, current in result["levels"].items():
+            previous = baseline.get(service, {}).get("levels", {}).get(level)
+            if previous is None:
+                continue
+            if current["errors"] > previous["errors"]:
+                regressions.append(service + " @" + level + ": errors " + str(previous["errors"]) + " -> " + str(current["errors"]))
+            for metric, higher_is_better in METRICS:
+                change = relative_change(current[metric], previous[metric])
+                if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                    regressions.append(service + " @" + level + ": " + metric + " " + format_value(previous[metric]) + " -> " + format_value(current[metric]) + " (" + format_change(change) + ")")
+    return regressions
+
+def relative_change(current: float, previous: float) -> float:
+    return (current - previous) / previous if previous else 0.0
+
+def format_value(value: float) -> str:
+    return "%.1f" % value
+
+def format_change(change: float) -> str:
+    return "%+.0f%%" % (change * 100)
+
+def print_table(results: Dict[str, Any], baseline: Dict[str, Any]):
+    header = ["service", "conc"] + [metric for metric, _ in METRICS] + ["errors"]
+    rows = [header]
+    for service, result in results.items():
+        for level, current in result["levels"].items():
+            previous: Optional[Dict] = baseline.get(service, {}).get("levels", {}).get(level)
+            row = [service, level]
+            for metric, _ in METRICS:
+                cell = format_value(current[metric])
+                if previous is not None:
+                    cell += " (" + format_change(relative_change(current[metric], previous[metric])) + ")"
+                row.append(cell)
+            row.append(str(current["errors"]))
+            rows.append(row)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python inference services against tiny random-weight models.")
+    parser.add_argument("services", nargs="*", metavar="service", help="services to run (default: all): " + ", ".join(SERVICES))
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=None, help="requests per concurrency level (default: per service)")
+    parser.add_argument("--baseline", default=os.path.join(BENCHMARKS_DIR, "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression per metric")
+    parser.add_argument("--output", default=None, help="also write this run's results to a JSON file")
+    parser.add_argument("--model-cache", default=os.path.join(BENCHMARKS_DIR, ".models"), help="where the tiny models are built")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="environment override for the services")
+    args = parser.parse_args()
+    unknown = set(args.services) - set(SERVICES)
+    if len(unknown) > 0:
+        parser.error("unknown services: " + ", ".join(sorted(unknown)))
+
+    env_overrides = dict(item.split("=", 1) for item in args.env)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    failed = []
+    for service in args.services or list(SERVICES):
+        requests = args.requests or SERVICES[service]["requests"]
+        print("Benchmarking " + service + " (" + str(requests) + " requests per level)", file=sys.stderr)
+        try:
+            results[service] = run_service(service, args.concurrency, requests, os.path.abspath(args.model_cache), env_overrides)
+        except subprocess.CalledProcessError as e:
+            # Keep going so one broken service does not hide the numbers for the rest
+            failed.append(service + " (exit status " + str(e.returncode) + ")")
+
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if len(failed) > 0:
+        print("\nFailed: " + ", ".join(failed))
+        sys.exit(1)
+
+    if args.update_baseline:
+        # Only the services that ran are replaced; the rest of the baseline is kept
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print("Baseline updated: " + args.baseline)
+        return
+
+    if len(baseline) == 0:
+        print("No baseline at " + args.baseline + "; run with --update-baseline to store one")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if len(regressions) > 0:
+        print("\nRegressions beyond " + format_change(args.tolerance) + ":")
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(1)
+    print("\nNo regressions beyond " + format_change(args.tolerance))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmarks a single service inside this process.
+
+Started by `benchmarks.run` with the service's `app` directory on PYTHONPATH and
+its model cache directory as the working directory (so `./model` resolves to the
+tiny random-weight model). The FastAPI app is driven through httpx's ASGI
+transport, so the numbers cover routing, validation, batching and inference
+but not the network stack.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import time
+from typing import Any, Dict, List
+from benchmarks import workloads
+
+SERVICES = {
+    "ml-reranker": {"workload": workloads.rerank_request, "requests": 32},
+    "ml-zero-shot-classifier": {"workload": workloads.classify_request, "requests": 32},
+    "ml-summarizer": {"workload": workloads.summarize_request, "requests": 8},
+    "article-fetcher": {"workload": workloads.fetch_request, "requests": 32},
+    "image-recognition-v2": {"workload": workloads.analyze_request, "path": "/analyze", "requests": 8},
+}
+
+# Caches (and summary dedup) would turn every repeated shape into a lookup; the benchmark measures the model path
+DEFAULT_ENV = {
+    "AUTH_TOKEN": "",
+    "RESULT_CACHE_MAX_ENTRIES": "0",
+    "RESULT_CACHE_DISK_PATH": "",
+    "ARTICLE_CACHE_MAX_ENTRIES": "0",
+    "ARTICLE_CACHE_DISK_PATH": "",
+    "SUMMARIZER_DEDUP_MAX_ENTRIES": "0",
+}
+
+def reset_peak_rss():
+    # Linux resets VmHWM to the current RSS when "5" is written to clear_refs
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Lifetime peak only; ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values: List[float], q: float) -> float:
+    import numpy as np
+    return float(np.percentile(values, q)) if len(values) > 0 else 0.0
+
+async def run_level(client, path: str, requests: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    pending = iter(requests)
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for body in pending:
+            started_at = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                if response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    reset_peak_rss()
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    return {
+        "requests": len(requests),
+        "errors": errors,
+        "throughput": len(requests) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+async def benchmark(service: str, concurrency_levels: List[int], request_count: int, fixture_url: str) -> Dict[str, Any]:
+    import httpx
+    import server
+
+    spec = SERVICES[service]
+    requests = workloads.requests_for(spec["workload"], request_count, fixture_url)
+    result = {"startup": None, "levels": {}}
+    async with server.app.router.lifespan_context(server.app):
+        if hasattr(server, "startup"):
+            await server.startup.models()
+            result["startup"] = server.startup.report()
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            # Not measured: first-request allocations, thread pool spin-up and the like
+            await run_level(client, spec.get("path", "/"), workloads.requests_for(spec["workload"], 2, fixture_url, seed=1), 1)
+            for concurrency in concurrency_levels:
+                result["levels"][str(concurrency)] = await run_level(client, spec.get("path", "/"), requests, concurrency)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("service", choices=sorted(SERVICES))
+    parser.add_argument("--concurrency", required=True)
+    parser.add_argument("--requests", type=int, required=True)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    from benchmarks.fixtures import FixtureServer
+    from benchmarks.models import ensure_model
+    ensure_model(args.service, os.path.abspath("./model"))
+    for key, value in DEFAULT_ENV.items():
+        os.environ.setdefault(key, value)
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    with FixtureServer() as fixtures:
+        result = asyncio.run(benchmark(args.service, concurrency_levels, args.requests, fixtures.url))
+    with open(args.output, "w") as f:
+        json.dump(result, f)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import random
+from typing import Any, Callable, Dict, List
+
+# Small fixed vocabulary so the tiny tokenizers cover the generated text with real
+# word pieces instead of falling back to one token per character.
+WORDS = (
+    "the a of to and in for on with at by from as is was are were be has have had "
+    "government minister president election vote parliament party policy budget tax "
+    "economy market inflation bank price rate growth trade export import company "
+    "police court case law report official statement investigation security "
+    "city province region capital village residents people public community "
+    "flood storm rain weather earthquake fire disaster emergency rescue damage "
+    "health hospital doctor patients vaccine disease outbreak treatment "
+    "school university students teacher education exam "
+    "football match team player coach league goal win season final "
+    "technology phone internet app data startup digital online users "
+    "said says told according announced reported confirmed denied expected "
+    "new old big small first last more most many several some all "
+    "today yesterday tomorrow week month year morning night "
+    "after before during while since until because however although "
+    "will would could should may might must can not no also still "
+    "road traffic train airport flight bus transport "
+    "energy oil gas electricity power plant coal solar"
+).split()
+
+TAGS = [
+    "politics", "economy", "business", "crime", "law", "disaster", "weather", "health",
+    "education", "sports", "technology", "transport", "energy", "environment", "entertainment",
+    "religion", "international", "military", "culture", "science", "agriculture", "tourism",
+    "finance", "labor",
+]
+
+def make_text(rng: random.Random, words: int) -> str:
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 24))
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        sentences.append(sentence[0].upper() + sentence[1:] + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+def classify_request(rng: random.Random, index: int, fixture_url: str) -> Dict[str, Any]:
+    # A harvest batch of tweets against the relevancy tags
+    return {
+        "queries": [make_text(rng, rng.randint(12, 50)) for _ in range(rng.randint(4, 16))],
+        "classes": rng.sample(TAGS, 12),
+    }
+
+def rerank_request(rng: random.Random, index: int, fixture_url: str) -> Dict[str, Any]:
+    # semantic-search asks for 2 * (10 + offset + limit) candidates
+    return {
+        "base_passage": make_text(rng, rng.randint(3, 10)),
+        "queries": [make_text(rng, rng.randint(30, 90)) for _ in range(rng.choice([20, 50, 100, 200]))],
+        "top_k": 10,
+    }
+
+def summarize_request(rng: random.Random, index: int, fixture_url: str) -> Dict[str, Any]:
+    return {"text": make_text(rng, rng.randint(600, 2000))}
+
+def fetch_request(rng: random.Random, index: int, fixture_url: str) -> Dict[str, Any]:
+    # Unique paths so every request goes through download and extraction
+    return {"urls": [fixture_url + "/article/" + str(index) + "-" + str(i) for i in range(10)]}
+
+def analyze_request(rng: random.Random, index: int, fixture_url: str) -> Dict[str, Any]:
+    return {
+        "imageUrls": [fixture_url + "/image/" + str(index) + "-" + str(i) + ".png" for i in range(4)],
+        "tasks": ["ocr", "caption"],
+    }
+
+def requests_for(make_request: Callable[[random.Random, int, str], Dict[str, Any]], count: int, fixture_url: str, seed: int = 0) -> List[Dict[str, Any]]:
+    # Seeded, so every run and every concurrency level replays the same shapes
+    rng = random.Random(seed)
+    return [make_request(rng, i, fixture_url) for i in range(count)]
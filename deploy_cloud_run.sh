@@ -105,7 +105,7 @@ fi
 max_instances=3
 concurrency=80
 # Handle special case for ml-reranker and ml-zero-shot-classifier
-if [[ "$service" == "ml-reranker" ]] || [[ "$service" == "ml-zero-shot-classifier" ]] || [[ "$service" == "ml-summarizer" ]]; then
+if [[ "$service" == "ml-reranker" ]] || [[ "$service" == "ml-zero-shot-classifier" ]] || [[ "$service" == "ml-summarizer" ]] || [[ "$service" == "ml-pipeline" ]]; then
     if [ -z "$ML_ENVIRONMENT" ]; then
         echo "Error: ML_ENVIRONMENT is not set. It must be either 'cpu' or 'gpu'."
         exit 1
@@ -115,6 +115,10 @@ if [[ "$service" == "ml-reranker" ]] || [[ "$service" == "ml-zero-shot-classifie
     cpu=2
     max_instances=10
     concurrency=4
+    # Summarizer and classifier weights in one instance
+    if [[ "$service" == "ml-pipeline" ]]; then
+        memory="8G"
+    fi
 fi
 
 declare -A services=(
@@ -124,6 +128,7 @@ declare -A services=(
     ["ml-zero-shot-classifier"]="ZERO_SHOT_CLASSIFIER_ENDPOINT:/"
     ["ml-reranker"]="RERANKER_ENDPOINT:/"
     ["ml-summarizer"]="SUMMARIZER_ENDPOINT:/"
+    ["ml-pipeline"]="PIPELINE_ENDPOINT:/pipeline"
     ["semantic-search"]="SEMANTIC_SEARCH_ENDPOINT:/semantic-search"
 )
 
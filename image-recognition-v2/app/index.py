@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 import os
-import uvicorn
+from processors.serving import serve
 
 load_dotenv()
 
@@ -11,4 +11,4 @@ if __name__ == "__main__":
     hostname = parsed_url.hostname
     port = parsed_url.port
     print(hostname)
-    uvicorn.run("server:app", host=hostname, port=port)
\ No newline at end of file
+    serve("server:app", host=hostname, port=port)
\ No newline at end of file
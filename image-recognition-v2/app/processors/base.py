@@ -1,10 +1,28 @@
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Callable, List, Optional
 from concurrent.futures import ThreadPoolExecutor
+from processors.admission import AdmissionController
+from processors.instrumentation import metrics
 
 class Processor(ABC):
     def __init__(self):
         self.executor = ThreadPoolExecutor(max_workers=5)  # Adjust max_workers as needed
+        # Work waits (bounded, by priority) here rather than in the executor's unbounded queue
+        self.admission = AdmissionController.from_env(self.executor, 5)
+        metrics.gauge("executor_queue_depth", lambda: self.admission.queued, processor=type(self).__name__)
+
+    async def run_in_executor(self, fn: Callable[..., Any], *args, priority: Optional[int] = None) -> Any:
+        # Time spent waiting for a free worker is recorded apart from the work itself
+        submitted_at = time.perf_counter()
+        def timed():
+            metrics.observe("stage_duration_seconds", time.perf_counter() - submitted_at, stage="queue_wait")
+            return fn(*args)
+        return await self.admission.run(timed, priority=priority)
+
+    def warm_up(self):
+        # Subclasses run one tiny inference here so the first real request is not the slow one
+        pass
 
     @abstractmethod
     def process_image_url(self, image_url: str) -> List[str]:
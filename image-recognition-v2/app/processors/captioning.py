@@ -1,17 +1,42 @@
-import asyncio
-from transformers import pipeline
+import os
+import numpy as np
+from typing import List
 from processors.base import Processor  # Importing Processor from base.py
+from processors.instrumentation import SIZE_BUCKETS, metrics, record_model_memory
 
 class Captioning(Processor):
     def __init__(self):
         super().__init__()
-        self.caption_pipeline = pipeline("image-to-text", model="Salesforce/blip-image-captioning-base")
+        # Imported here so the server starts without paying for torch up front
+        from transformers import pipeline
+        # Saved as safetensors by preload.py; memory-mapped and copied straight into place
+        self.caption_pipeline = pipeline("image-to-text", model="./model/caption", model_kwargs={"low_cpu_mem_usage": True})
+        record_model_memory("caption", self.caption_pipeline.model)
+        self.max_new_tokens = int(os.getenv('IR_CAPTION_MAX_NEW_TOKENS') or 30)
 
     async def generate_caption(self, image_path: str):
-        loop = asyncio.get_event_loop()
-        caption = await loop.run_in_executor(self.executor, self.caption_pipeline, image_path)
+        caption = await self.run_in_executor(self.caption_pipeline, image_path)
         return caption
 
+    async def caption_images(self, images: List[np.ndarray]) -> List[str]:
+        if len(images) == 0:
+            return []
+        return await self.run_in_executor(self._caption_batch, images)
+
+    def warm_up(self):
+        self._caption_batch([np.zeros((32, 32, 3), dtype=np.uint8)])
+
+    def _caption_batch(self, images: List[np.ndarray]) -> List[str]:
+        import torch
+        # All images share one padded generate call instead of one pipeline pass each
+        model = self.caption_pipeline.model
+        metrics.observe("batch_size", len(images), buckets=SIZE_BUCKETS, stage="caption")
+        with metrics.timer("caption_preprocess"):
+            inputs = self.caption_pipeline.image_processor(images=images, return_tensors="pt").to(model.device)
+        with metrics.timer("caption"), torch.no_grad():
+            output_ids = model.generate(pixel_values=inputs["pixel_values"], max_new_tokens=self.max_new_tokens)
+        return [caption.strip() for caption in self.caption_pipeline.tokenizer.batch_decode(output_ids, skip_special_tokens=True)]
+
     async def process_image_url(self, image_url: str):
         try:
             caption = await self.generate_caption(image_url)
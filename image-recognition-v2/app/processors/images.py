@@ -0,0 +1,45 @@
+import asyncio
+import os
+from io import BytesIO
+from concurrent.futures import Executor
+from typing import Union
+import numpy as np
+from httpx import AsyncClient, Limits, Timeout
+from PIL import Image
+from processors.instrumentation import metrics
+
+class ImageLoader:
+    """
+    Downloads images through one pooled HTTP client and decodes each of them once
+    into an RGB uint8 array that OCR and captioning can both consume.
+    """
+    def __init__(self):
+        self.timeout = float(os.getenv('IR_FETCH_TIMEOUT_SECONDS') or 15)
+        self.max_connections = int(os.getenv('IR_FETCH_MAX_CONNECTIONS') or 32)
+        self.client: Union[AsyncClient, None] = None
+
+    async def start(self):
+        self.client = AsyncClient(
+            follow_redirects=True,
+            timeout=Timeout(self.timeout),
+            limits=Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def load(self, image_url: str, executor: Union[Executor, None] = None) -> np.ndarray:
+        if self.client is None:
+            await self.start()
+        with metrics.timer("fetch"):
+            response = await self.client.get(image_url)
+        response.raise_for_status()
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, self.decode, response.content)
+
+    @staticmethod
+    def decode(content: bytes) -> np.ndarray:
+        with metrics.timer("decode"), Image.open(BytesIO(content)) as image:
+            return np.asarray(image.convert("RGB"))
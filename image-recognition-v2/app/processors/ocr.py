@@ -1,28 +1,83 @@
 import os
 import asyncio
-import easyocr
+import numpy as np
+from typing import Any, List, Union
 from processors.base import Processor  # Importing Processor from base.py
+from processors.instrumentation import metrics, record_model_memory
 
 class OCR(Processor):
     def __init__(self):
         super().__init__()
-        self.reader = easyocr.Reader(['en'], gpu=(os.getenv("IR_ENVIRONMENT") == "gpu"))  # Initialize EasyOCR reader
-
-    async def recognize_text_and_group_by_lines(self, image_path: str):
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(self.executor, self.reader.readtext, image_path)
-        print(results)
-
-        lines = {}
-        for (bbox, text, confidence) in results:
-            y0 = bbox[0][1]
-            if confidence > 0.8:
-                if y0 not in lines:
-                    lines[y0] = []
-                lines[y0].append(text)
-
-        line_strings = [' '.join(lines[y]) for y in sorted(lines)]
-        return line_strings
+        # Imported here so the server starts without paying for torch up front
+        import easyocr
+        # Weights are baked into the image by preload.py, never downloaded at runtime
+        self.reader = easyocr.Reader(['en'], gpu=(os.getenv("IR_ENVIRONMENT") == "gpu"), model_storage_directory="./model/easyocr", download_enabled=False)  # Initialize EasyOCR reader
+        record_model_memory("ocr_detector", self.reader.detector)
+        record_model_memory("ocr_recognizer", self.reader.recognizer)
+        # Larger images are shrunk before detection; tweet text stays legible well below this
+        self.max_side = int(os.getenv('IR_OCR_MAX_SIDE') or 1280)
+        # Boxes whose centers are within this fraction of the median box height share a line
+        self.line_tolerance = float(os.getenv('IR_OCR_LINE_TOLERANCE') or 0.5)
+
+    async def recognize_text_and_group_by_lines(self, image: Union[str, np.ndarray]):
+        # Accepts a path/URL or an already decoded RGB array
+        results = await self.run_in_executor(self._read, image)
+        return self.group_by_lines(results)
+
+    def _read(self, image: Union[str, np.ndarray]):
+        # readtext split in two: the detector doubles as the text-presence check, and
+        # images it finds nothing in (most memes and photos) never reach the recognizer
+        from easyocr.utils import reformat_input
+        with metrics.timer("ocr"):
+            img, img_cv_grey = reformat_input(image)
+            img, img_cv_grey = self.downscale(img), self.downscale(img_cv_grey)
+            with metrics.timer("ocr_detect"):
+                horizontal_list, free_list = self.reader.detect(img, reformat=False)
+            horizontal_list, free_list = horizontal_list[0], free_list[0]
+            if len(horizontal_list) == 0 and len(free_list) == 0:
+                metrics.inc("ocr_images_total", text="false")
+                return []
+            metrics.inc("ocr_images_total", text="true")
+            with metrics.timer("ocr_recognize"):
+                return self.reader.recognize(img_cv_grey, horizontal_list, free_list, reformat=False)
+
+    def downscale(self, image: np.ndarray) -> np.ndarray:
+        import cv2
+        height, width = image.shape[:2]
+        if self.max_side <= 0 or max(height, width) <= self.max_side:
+            return image
+        scale = self.max_side / max(height, width)
+        return cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+
+    def warm_up(self):
+        # A blank image stops after detection, so the recognizer gets one box of its own
+        self.reader.detect(np.zeros((32, 32, 3), dtype=np.uint8), reformat=False)
+        self.reader.recognize(np.zeros((32, 32), dtype=np.uint8), [[0, 32, 0, 32]], [], reformat=False)
+
+    async def recognize_images(self, images: List[np.ndarray]) -> List[List[str]]:
+        return await asyncio.gather(*(self.recognize_text_and_group_by_lines(image) for image in images))
+
+    def group_by_lines(self, results: List[Any]) -> List[str]:
+        kept = [(bbox, text) for (bbox, text, confidence) in results if confidence > 0.8]
+        if len(kept) == 0:
+            return []
+        texts = [text for _, text in kept]
+        boxes = np.asarray([bbox for bbox, _ in kept], dtype=np.float32)  # (boxes, 4 corners, xy)
+        tops, bottoms = boxes[:, :, 1].min(axis=1), boxes[:, :, 1].max(axis=1)
+        lefts = boxes[:, :, 0].min(axis=1)
+        centers = (tops + bottoms) / 2
+        tolerance = self.line_tolerance * max(float(np.median(bottoms - tops)), 1.0)
+
+        # Walking the boxes top to bottom, a new line starts wherever the gap between
+        # neighbouring centers exceeds the tolerance
+        by_center = np.argsort(centers, kind="stable")
+        line_of = np.empty(len(kept), dtype=np.int64)
+        line_of[by_center] = np.concatenate(([0], np.cumsum(np.diff(centers[by_center]) > tolerance)))
+
+        # Line by line, left to right within each
+        order = np.lexsort((lefts, line_of))
+        breaks = np.flatnonzero(np.diff(line_of[order])) + 1
+        return [' '.join(texts[i] for i in line) for line in np.split(order, breaks)]
 
     async def process_image_url(self, image_url: str):
         try:
@@ -1,38 +1,129 @@
 from fastapi import FastAPI, Request, HTTPException
+from contextlib import asynccontextmanager
+import asyncio
 import os
+from typing import List
+from pydantic import BaseModel
 from processors.ocr import OCR
 from processors.captioning import Captioning
+from processors.images import ImageLoader
+from processors.startup import Startup
+from processors import serving
+from processors.instrumentation import metrics_middleware, metrics_response
+from processors.admission import Rejected, admission_middleware, cancel_on_disconnect, rejected_handler
 
-app = FastAPI()
+class AnalyzeRequest(BaseModel):
+    imageUrls: List[str]
+    tasks: List[str] = ["ocr", "caption"]
 
-ocr_processor = OCR()
-captioning_processor = Captioning()
+def build_processors():
+    return (OCR(), Captioning())
+
+startup = Startup(build_processors)
+image_loader = ImageLoader()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Weights load in the background so the server can answer readiness probes meanwhile
+    startup.begin()
+    # The pooled HTTP client lives for the whole process
+    await image_loader.start()
+    yield
+    await image_loader.close()
+
+app = FastAPI(lifespan=lifespan)
 
 async def auth_middleware(request: Request, call_next):
     auth_token = request.headers.get('auth-token')
-    if os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
+    # Readiness probes come from the platform and carry no token
+    if request.url.path != "/ready" and os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
         raise HTTPException(status_code=403, detail="Unauthorized")
     response = await call_next(request)
     return response
 
+# Registered first so auth wraps them and unauthenticated requests are never queued or profiled
+app.middleware('http')(admission_middleware)
+app.middleware('http')(metrics_middleware)
 app.middleware('http')(auth_middleware)
+# Queue full (429 + Retry-After), deadline passed (504) or client gone (499)
+app.exception_handler(Rejected)(rejected_handler)
 
 @app.post("/ocr")
 async def handle_ocr_request(request: Request):
+    ocr_processor, _ = await startup.models()
     data = await request.json()
     image_url = data.get('imageUrl')
     try:
-        ocr_result = await ocr_processor.process_image_url(image_url)
+        ocr_result = await cancel_on_disconnect(request, ocr_processor.process_image_url(image_url))
         return {"status": "success", "result": ocr_result}
+    except Rejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/caption")
 async def handle_caption_request(request: Request):
+    _, captioning_processor = await startup.models()
     data = await request.json()
     image_url = data.get('imageUrl')
     try:
-        caption_result = await captioning_processor.process_image_url(image_url)
+        caption_result = await cancel_on_disconnect(request, captioning_processor.process_image_url(image_url))
         return {"status": "success", "result": caption_result}
+    except Rejected:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/analyze")
+async def handle_analyze_request(request_data: AnalyzeRequest, request: Request):
+    ocr_processor, captioning_processor = await startup.models()
+    unknown_tasks = set(request_data.tasks) - {"ocr", "caption"}
+    if len(unknown_tasks) > 0:
+        raise HTTPException(status_code=400, detail="Unknown tasks: " + ", ".join(sorted(unknown_tasks)))
+
+    # Download and decode every image once; both models read the same array
+    loaded = await asyncio.gather(*(image_loader.load(url) for url in request_data.imageUrls), return_exceptions=True)
+    results = [{"imageUrl": url, "ocr": None, "caption": None, "error": None} for url in request_data.imageUrls]
+    decoded = []
+    for result, image in zip(results, loaded):
+        if isinstance(image, Exception):
+            result["error"] = str(image)
+        else:
+            decoded.append((result, image))
+    images = [image for _, image in decoded]
+
+    jobs = []
+    if "caption" in request_data.tasks:
+        jobs.append(captioning_processor.caption_images(images))
+    if "ocr" in request_data.tasks:
+        jobs.append(ocr_processor.recognize_images(images))
+    try:
+        outputs = await cancel_on_disconnect(request, asyncio.gather(*jobs))
+    except Rejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+    for task, output in zip([task for task in ("caption", "ocr") if task in request_data.tasks], outputs):
+        for (result, _), value in zip(decoded, output):
+            result[task] = value
+    return {"status": "success", "result": results}
+
+@app.get("/ready")
+async def handle_ready_request():
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail=startup.error or "Loading models")
+    return {"status": "success"}
+
+@app.get("/startup")
+async def handle_startup_request():
+    return {"status": "success", "result": startup.report()}
+
+@app.get("/serving")
+async def handle_serving_request():
+    # Answered by whichever worker took the connection; shared vs private memory is per worker
+    return {"status": "success", "result": serving.report()}
+
+@app.get("/metrics")
+async def handle_metrics_request():
+    return metrics_response()
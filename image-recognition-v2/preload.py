@@ -2,9 +2,9 @@ import os
 from transformers import pipeline
 import easyocr
 
-# Initialize EasyOCR reader
-easyocr.Reader(['en'], gpu=(os.getenv("IR_ENVIRONMENT") == "gpu"))
-
-# Initialize Hugging Face pipeline
-pipeline("image-to-text", model="Salesforce/blip-image-captioning-base")
+# Initialize EasyOCR reader and keep its weights inside the image
+easyocr.Reader(['en'], gpu=(os.getenv("IR_ENVIRONMENT") == "gpu"), model_storage_directory="./model/easyocr")
 
+# Initialize Hugging Face pipeline and save it as safetensors so it loads from ./model instead of the hub cache
+caption_pipeline = pipeline("image-to-text", model="Salesforce/blip-image-captioning-base")
+caption_pipeline.save_pretrained("./model/caption", safe_serialization=True)
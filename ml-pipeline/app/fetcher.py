@@ -0,0 +1,185 @@
+import asyncio
+import os
+from collections import OrderedDict
+from httpx import AsyncClient, Limits, Timeout, URL
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+from extractor import ArticleExtractor
+from processors.instrumentation import metrics
+from url_cache import ArticleCache, canonicalize_url, find_canonical_link, is_shortener
+
+# (article text, cache status, error message)
+FetchResult = Tuple[Union[str, None], Union[str, None], Union[str, None]]
+
+class ArticleFetcher:
+    def __init__(self):
+        self.max_connections = int(os.getenv('ARTICLE_FETCHER_MAX_CONNECTIONS') or 64)
+        self.max_connections_per_host = int(os.getenv('ARTICLE_FETCHER_MAX_CONNECTIONS_PER_HOST') or 6)
+        self.timeout = float(os.getenv('ARTICLE_FETCHER_TIMEOUT_SECONDS') or 15)
+        self.max_redirect_entries = int(os.getenv('ARTICLE_FETCHER_REDIRECT_CACHE_SIZE') or 10000)
+        self.client: Union[AsyncClient, None] = None
+        self._global_semaphore: Union[asyncio.Semaphore, None] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Requested URL -> final URL after redirects, so t.co hops are only followed once
+        self._redirects: "OrderedDict[str, str]" = OrderedDict()
+        self.extractor = ArticleExtractor()
+        self.cache = ArticleCache.from_env()
+        metrics.gauge("article_cache_entries", lambda: len(self.cache))
+        metrics.gauge("extractor_documents_in_flight", lambda: self.extractor.in_flight)
+
+    async def start(self):
+        # One pooled client for the whole process: connections, TLS sessions and
+        # DNS results are reused across requests instead of rebuilt per URL.
+        self.client = AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=Timeout(self.timeout),
+            limits=Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=30,
+            ),
+            headers={"User-Agent": "Mozilla/5.0 (compatible; semar-article-fetcher)"},
+        )
+        self._global_semaphore = asyncio.Semaphore(self.max_connections)
+        await self.extractor.start()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        self.extractor.close()
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = URL(url).host
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_semaphores[host]
+
+    def _remember_redirect(self, url: str, final_url: str):
+        if url == final_url:
+            return
+        self._redirects[url] = final_url
+        self._redirects.move_to_end(url)
+        while len(self._redirects) > self.max_redirect_entries:
+            self._redirects.popitem(last=False)
+
+    async def _request(self, method: str, url: str, **kwargs):
+        # Wait for the host slot first so a busy host does not hold global slots hostage
+        async with self._host_semaphore(url):
+            async with self._global_semaphore:
+                return await self.client.request(method, url, **kwargs)
+
+    async def _resolve(self, url: str) -> str:
+        # Follow shortener hops with HEAD requests so a cached article needs no body download
+        target = self._redirects.get(url, url)
+        hops = 0
+        while is_shortener(target) and hops < 5:
+            response = await self._request("HEAD", target, follow_redirects=False)
+            if not response.is_redirect:
+                break
+            target = urljoin(target, response.headers["location"])
+            hops += 1
+        self._remember_redirect(url, target)
+        return target
+
+    async def _download(self, url: str, headers: Optional[Dict[str, str]] = None):
+        target = self._redirects.get(url, url)
+        response = await self._request("GET", target, headers=headers)
+        self._remember_redirect(url, str(response.url))
+        return response
+
+    async def run_fetch_articles(self, urls: List[str]) -> List[FetchResult]:
+        # This method now accepts a list of URLs and returns (article text, cache status, error) per URL
+        results = await asyncio.gather(*(self._fetch_and_process_url(url) for url in urls))
+        return results
+
+    async def fetch_article(self, url: Union[str, None]) -> FetchResult:
+        # One URL at a time, for callers that schedule the fetches themselves
+        return await self._fetch_and_process_url(url)
+
+    async def stream_articles(self, urls: List[Union[str, None]]) -> AsyncIterator[Tuple[int, FetchResult]]:
+        # Yields (index, result) as each URL finishes, in completion order
+        async def fetch_indexed(index: int, url: Union[str, None]):
+            return (index, await self._fetch_and_process_url(url))
+
+        tasks = [asyncio.ensure_future(fetch_indexed(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_and_process_url(self, url: Union[str, None]) -> FetchResult:
+        if url is None:
+            return (None, None, None)
+
+        try:
+            with metrics.timer("resolve"):
+                target = await self._resolve(url)
+            key = canonicalize_url(target)
+            entry = self.cache.get(key)
+            if entry is not None and self.cache.is_fresh(entry):
+                metrics.inc("articles_total", cache="hit")
+                return (entry["maintext"], "hit", None)
+
+            headers = {}
+            if entry is not None and entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry is not None and entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            with metrics.timer("fetch"):
+                response = await self._download(target, headers)
+            actual_url = response.url
+            if entry is not None and response.status_code == 304:
+                self.cache.touch(key, entry)
+                metrics.inc("articles_total", cache="revalidated")
+                return (entry["maintext"], "revalidated", None)
+            if response.is_error:
+                error = f"Failed to fetch {url} due to status {response.status_code}"
+                print(error)
+                metrics.inc("article_errors_total", stage="fetch")
+                return (None, "miss", error)
+            html = response.text
+        except Exception as e:
+            error = f"Failed to fetch {url} due to: {str(e)}"
+            print(error)
+            metrics.inc("article_errors_total", stage="fetch")
+            return (None, "miss", error)
+
+        # Extract from the body we already downloaded instead of letting newsplease fetch it again
+        try:
+            with metrics.timer("extract"):
+                article = await self.extractor.extract(html, str(actual_url))
+        except asyncio.TimeoutError:
+            error = f"Failed to process {url} due to: extraction timed out"
+            print(error)
+            metrics.inc("article_errors_total", stage="extract")
+            return (None, "miss", error)
+        except Exception as e:
+            error = f"Failed to process {url} due to: {str(e)}"
+            print(error)
+            metrics.inc("article_errors_total", stage="extract")
+            return (None, "miss", error)
+        metrics.inc("articles_total", cache="miss")
+        if article is None or not article["maintext"]:
+            return (None, "miss", None)
+
+        # Store under every spelling we know of: the requested target, the final URL and
+        # the page's own rel=canonical (which is how AMP pages point at the real article)
+        keys = {key, canonicalize_url(str(actual_url))}
+        canonical_link = find_canonical_link(html)
+        if canonical_link is not None:
+            keys.add(canonicalize_url(canonical_link))
+        for cache_key in keys:
+            self.cache.set(cache_key, article["maintext"], response.headers.get("etag"), response.headers.get("last-modified"))
+        return (article["maintext"], "miss", None)
+
+    async def fetch_articles(self, urls: List[str]):
+        try:
+            article = await self.run_fetch_articles(urls)
+            return article
+        except Exception as e:
+            # Handle exceptions or propagate them
+            raise e
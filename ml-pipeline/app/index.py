@@ -0,0 +1,14 @@
+from dotenv import load_dotenv
+from urllib.parse import urlparse
+import os
+from processors.serving import serve
+
+load_dotenv()
+
+if __name__ == "__main__":
+    url = os.getenv('PIPELINE_URL')
+    parsed_url = urlparse(url)
+    hostname = parsed_url.hostname
+    port = parsed_url.port
+    print(hostname)
+    serve("server:app", host=hostname, port=int(os.getenv('PIPELINE_PORT')))
\ No newline at end of file
@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from concurrent.futures import Executor
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from processors.instrumentation import metrics
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITIES = {"interactive": INTERACTIVE, "bulk": BULK}
+
+# Set per request by admission_middleware and read wherever work is queued, so
+# processors do not have to thread them through every call.
+request_priority: ContextVar[int] = ContextVar("request_priority", default=INTERACTIVE)
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+class Rejected(Exception):
+    status_code = 503
+
+    def headers(self):
+        return {}
+
+class Overloaded(Rejected):
+    status_code = 429
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many queued requests, retry in " + str(retry_after) + "s")
+        self.retry_after = retry_after
+
+    def headers(self):
+        return {"Retry-After": str(self.retry_after)}
+
+class DeadlineExceeded(Rejected):
+    status_code = 504
+
+    def __init__(self):
+        super().__init__("Request deadline exceeded")
+
+class ClientDisconnected(Rejected):
+    # nginx's "client closed request"; nobody is left to read it
+    status_code = 499
+
+    def __init__(self):
+        super().__init__("Client disconnected")
+
+class Job:
+    def __init__(self, fn: Callable[..., Any], args: tuple, deadline: Optional[float], future: asyncio.Future):
+        self.fn = fn
+        self.args = args
+        self.deadline = deadline
+        self.future = future
+
+class AdmissionController:
+    """
+    Bounded, prioritized front door to a processor's executor.
+
+    At most `max_concurrency` jobs run on the executor; the rest wait here, lowest
+    priority value first, up to `max_queue` jobs. Beyond that callers get
+    `Overloaded` with a Retry-After estimated from recent job durations. Jobs whose
+    caller was cancelled (client disconnected) or whose deadline passed are dropped
+    before they start, so no executor thread is spent on answers nobody reads.
+    """
+    def __init__(self, executor: Executor, max_concurrency: int, max_queue: int = 64):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.running = 0
+        self.average_seconds = 1.0
+        self._pending: List = []
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_env(cls, executor: Executor, max_concurrency: int):
+        return cls(executor, max_concurrency, max_queue=int(os.getenv('ADMISSION_MAX_QUEUE') or 64))
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, job in self._pending if not job.future.done())
+
+    def retry_after(self, queued: int) -> int:
+        # Time for the jobs ahead to drain at the observed pace, in whole seconds
+        return max(1, math.ceil(self.average_seconds * (queued + 1) / self.max_concurrency))
+
+    async def run(self, fn: Callable[..., Any], *args, priority: Optional[int] = None, deadline: Optional[float] = None) -> Any:
+        priority = request_priority.get() if priority is None else priority
+        deadline = request_deadline.get() if deadline is None else deadline
+        if deadline is not None and deadline <= time.monotonic():
+            raise DeadlineExceeded()
+        queued = self.queued
+        if queued >= self.max_queue:
+            raise Overloaded(self.retry_after(queued))
+
+        job = Job(fn, args, deadline, asyncio.get_event_loop().create_future())
+        heapq.heappush(self._pending, (priority, next(self._sequence), job))
+        self._dispatch()
+        try:
+            if deadline is None:
+                return await job.future
+            return await asyncio.wait_for(job.future, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+        finally:
+            # Cancelled or timed out while still queued: it is skipped at dispatch
+            if not job.future.done():
+                job.future.cancel()
+
+    def _dispatch(self):
+        loop = asyncio.get_event_loop()
+        while self.running < self.max_concurrency and len(self._pending) > 0:
+            _, _, job = heapq.heappop(self._pending)
+            if job.future.done():
+                continue
+            if job.deadline is not None and job.deadline <= time.monotonic():
+                job.future.set_exception(DeadlineExceeded())
+                continue
+            self.running += 1
+            started_at = time.perf_counter()
+            work = loop.run_in_executor(self.executor, job.fn, *job.args)
+            work.add_done_callback(lambda work, job=job, started_at=started_at: self._finish(job, work, started_at))
+
+    def _finish(self, job: Job, work: asyncio.Future, started_at: float):
+        self.running -= 1
+        self.average_seconds = 0.8 * self.average_seconds + 0.2 * (time.perf_counter() - started_at)
+        if not job.future.done():
+            if work.exception() is not None:
+                job.future.set_exception(work.exception())
+            else:
+                job.future.set_result(work.result())
+        self._dispatch()
+
+def _deadline_from(request: Request) -> Optional[float]:
+    # A relative budget in milliseconds, so client and server clocks need not agree
+    budget = request.headers.get('x-deadline-ms')
+    if not budget:
+        return None
+    try:
+        return time.monotonic() + float(budget) / 1000
+    except ValueError:
+        return None
+
+async def admission_middleware(request: Request, call_next):
+    default_priority = os.getenv('ADMISSION_DEFAULT_PRIORITY') or 'interactive'
+    priority = PRIORITIES.get(request.headers.get('x-priority') or default_priority, INTERACTIVE)
+    priority_token = request_priority.set(priority)
+    deadline_token = request_deadline.set(_deadline_from(request))
+    try:
+        return await call_next(request)
+    finally:
+        request_priority.reset(priority_token)
+        request_deadline.reset(deadline_token)
+
+async def rejected_handler(request: Request, exc: Rejected):
+    metrics.inc("admission_rejections_total", reason=type(exc).__name__)
+    return JSONResponse({"detail": str(exc)}, status_code=exc.status_code, headers=exc.headers())
+
+async def cancel_on_disconnect(request: Request, work: Any, poll_seconds: float = 0.25) -> Any:
+    # Starlette keeps running a handler after its client hangs up; poll for that and
+    # cancel the work so anything still queued behind the executor is dropped.
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if task in done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
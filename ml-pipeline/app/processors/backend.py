@@ -0,0 +1,37 @@
+import os
+
+INFERENCE_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# ORT model class used to load each pipeline task from an exported graph
+ORT_TASK_MODELS = {
+    "zero-shot-classification": "ORTModelForSequenceClassification",
+    "summarization": "ORTModelForSeq2SeqLM",
+}
+
+def inference_backend() -> str:
+    backend = os.getenv('INFERENCE_BACKEND') or 'torch'
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError("Unknown inference backend: " + backend + " (expected one of " + ", ".join(INFERENCE_BACKENDS) + ")")
+    return backend
+
+def onnx_model_path(model_path: str, backend: str) -> str:
+    # preload.py exports to <model>/onnx and quantizes to <model>/onnx-int8
+    return os.path.join(model_path, backend)
+
+def load_pipeline(task: str, model_path: str, backend: str):
+    if backend == "torch":
+        from transformers import pipeline
+        # Safetensors weights are memory-mapped and copied straight into place, skipping random init
+        return pipeline(task, model=model_path, model_kwargs={"low_cpu_mem_usage": True})
+
+    import optimum.onnxruntime
+    from optimum.pipelines import pipeline as ort_pipeline
+    from transformers import AutoTokenizer
+    path = onnx_model_path(model_path, backend)
+    model_class = getattr(optimum.onnxruntime, ORT_TASK_MODELS[task])
+    if model_class is optimum.onnxruntime.ORTModelForSeq2SeqLM:
+        # Generate with the decoder-with-past graph so key/values are not recomputed per token
+        model = model_class.from_pretrained(path, use_cache=True)
+    else:
+        model = model_class.from_pretrained(path)
+    return ort_pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(path), accelerator="ort")
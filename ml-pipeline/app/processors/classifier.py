@@ -0,0 +1,120 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from processors.base import Processor  # Importing Processor from base.py
+from processors.backend import load_pipeline
+from processors.batcher import MicroBatcher
+from processors.instrumentation import metrics, record_model_memory
+from processors.prefilter import LabelPrefilter
+
+class ZeroShotClassifier(Processor):
+    model_id = "MoritzLaurer/deberta-v3-large-zeroshot-v1.1-all-33"
+
+    def __init__(self, threshold=0.75, hypothesis_template="This example is {}."):
+        super().__init__()
+        self.model = load_pipeline("zero-shot-classification", self.model_path, self.backend)
+        record_model_memory(self.model_id, self.model.model)
+        self.threshold = threshold
+        self.hypothesis_template = hypothesis_template
+        # Same label resolution the zero-shot pipeline uses for multi_label scoring
+        self.entailment_id = self.model.entailment_id
+        self.contradiction_id = -1 if self.entailment_id == 0 else 0
+        self.batcher = MicroBatcher(
+            self._predict_pairs,
+            self.run_in_executor,
+            max_batch_size=int(os.getenv('ZERO_SHOT_CLASSIFIER_MAX_BATCH_SIZE') or 32),
+            max_wait_ms=float(os.getenv('ZERO_SHOT_CLASSIFIER_MAX_WAIT_MS') or 10),
+            max_queued_items=int(os.getenv('ZERO_SHOT_CLASSIFIER_MAX_QUEUED_PAIRS') or 4096),
+        )
+        # Optional embedding stage that narrows the label list before NLI (None when disabled)
+        self.prefilter = LabelPrefilter.from_env(os.path.join(self.model_path, "prefilter"))
+        if self.prefilter is not None:
+            record_model_memory("prefilter", self.prefilter.model)
+
+    async def classify(self, queries: List[str], classes: List[str]):
+        metrics.inc("classify_queries_total", len(queries))
+        tasks = [asyncio.ensure_future(self.classify_query(query, classes)) for query in queries]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            # One rejected query fails the request; take the others' pairs out of the queue too
+            for task in tasks:
+                task.cancel()
+        filtered_results = [labels for labels, _, _ in results]
+        filtered_scores = [scores for _, scores, _ in results]
+        pruned = [pruned_labels for _, _, pruned_labels in results]
+        return (filtered_results, filtered_scores, pruned)
+
+    async def stream_classify(self, queries: List[str], classes: List[str]) -> AsyncIterator[Tuple[int, Any, Any, Any, Optional[str]]]:
+        # Yields (index, labels, scores, pruned, error) as each query finishes, in completion order
+        metrics.inc("classify_queries_total", len(queries))
+        async def classify_indexed(index: int, query: str):
+            try:
+                labels, scores, pruned = await self.classify_query(query, classes)
+                return (index, labels, scores, pruned, None)
+            except Exception as e:
+                return (index, None, None, None, str(e))
+
+        tasks = [asyncio.ensure_future(classify_indexed(i, query)) for i, query in enumerate(queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def classify_query(self, query: str, classes: List[str]) -> Tuple[List[str], List[float], List[str]]:
+        prefilter_config = self.prefilter.config() if self.prefilter is not None else None
+        key = self.cache_key(query, sorted(classes), self.threshold, self.hypothesis_template, prefilter_config)
+        [(hit, cached)] = await self.cache_get_many([key])
+        if hit:
+            return (cached[0], cached[1], cached[2])
+
+        pruned = []
+        if self.prefilter is not None:
+            classes, pruned = await self.run_in_executor(self.prefilter.select, query, classes)
+            metrics.inc("prefilter_pruned_labels_total", len(pruned))
+
+        # Every (query, class) hypothesis pair goes through the shared batcher, so pairs
+        # from concurrent queries and requests end up in the same forward pass.
+        scores = await self.batcher.submit([(query, label) for label in classes])
+
+        # Filter labels based on the threshold, best label first
+        labels_scores = sorted(
+            [(label, score) for label, score in zip(classes, scores) if score >= self.threshold],
+            key=lambda x: x[1],
+            reverse=True,
+        )
+        filtered_labels = list(map(lambda x: x[0], labels_scores))
+        filtered_scores = list(map(lambda x: x[1], labels_scores))
+        await self.cache_set_many([(key, [filtered_labels, filtered_scores, pruned])])
+        return (filtered_labels, filtered_scores, pruned)
+
+    def warm_up(self):
+        self._predict_pairs([("warm up", "warm up")])
+        if self.prefilter is not None:
+            self.prefilter.warm_up()
+
+    def _predict_pairs(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        import torch
+        with metrics.timer("tokenize"):
+            inputs = self.model.tokenizer(
+                [query for query, _ in pairs],
+                [self.hypothesis_template.format(label) for _, label in pairs],
+                padding=True,
+                truncation="only_first",
+                return_tensors="pt",
+            ).to(self.model.device)
+        with metrics.timer("forward"), torch.no_grad():
+            logits = self.model.model(**inputs).logits
+        with metrics.timer("postprocess"):
+            entail_contr_logits = logits[:, [self.contradiction_id, self.entailment_id]]
+            return entail_contr_logits.softmax(dim=-1)[:, 1].tolist()
+
+    async def process_texts(self, queries: List[str], classes: List[str]):
+        try:
+            (filtered_results, filtered_scores, pruned) = await self.classify(queries, classes)
+            return (filtered_results, filtered_scores, pruned)
+        except Exception as e:
+            # Handle exceptions or propagate them
+            raise e
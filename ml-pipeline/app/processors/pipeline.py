@@ -0,0 +1,94 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from processors.instrumentation import metrics
+
+class Pipeline:
+    """
+    Fetch -> summarize -> classify as a streaming DAG inside one process.
+
+    Every URL becomes a record that moves on to the next stage as soon as its
+    current stage finishes, so summarization starts on the first article fetched
+    instead of waiting for the slowest one. Stages are joined by bounded queues
+    (`queue_size`): a fast stage blocks instead of piling full article bodies up in
+    memory. Each stage runs a fixed number of workers; past the fetcher's own
+    connection limits and the processors' admission queues, these bound how much
+    of a request is in flight at each step.
+
+    Records are yielded in completion order and carry their input `index`. A
+    failed URL keeps its error inline and leaves the pipeline at that stage.
+    """
+    def __init__(self, fetcher, summarizer, classifier, fetch_concurrency: int = 16, summarize_concurrency: int = 2, classify_concurrency: int = 8, queue_size: int = 8):
+        self.fetcher = fetcher
+        self.summarizer = summarizer
+        self.classifier = classifier
+        self.fetch_concurrency = fetch_concurrency
+        self.summarize_concurrency = summarize_concurrency
+        self.classify_concurrency = classify_concurrency
+        self.queue_size = queue_size
+
+    @classmethod
+    def from_env(cls, fetcher, summarizer, classifier):
+        return cls(
+            fetcher,
+            summarizer,
+            classifier,
+            fetch_concurrency=int(os.getenv('PIPELINE_FETCH_CONCURRENCY') or 16),
+            # Matches the summarizer's executor; more would only wait in its admission queue
+            summarize_concurrency=int(os.getenv('PIPELINE_SUMMARIZE_CONCURRENCY') or summarizer.max_workers),
+            classify_concurrency=int(os.getenv('PIPELINE_CLASSIFY_CONCURRENCY') or 8),
+            queue_size=int(os.getenv('PIPELINE_QUEUE_SIZE') or 8),
+        )
+
+    async def run(self, urls: List[Union[str, None]], classes: List[str], strategy: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        pending: asyncio.Queue = asyncio.Queue()
+        to_summarize: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        to_classify: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        done: asyncio.Queue = asyncio.Queue()
+        for index, url in enumerate(urls):
+            pending.put_nowait({"index": index, "summary": None, "labels": None, "scores": None, "pruned": None, "cache": None, "error": None, "url": url})
+
+        async def fetch():
+            while True:
+                record = await pending.get()
+                text, record["cache"], record["error"] = await self.fetcher.fetch_article(record.pop("url"))
+                if text is None or record["error"] is not None:
+                    await done.put(record)
+                    continue
+                record["text"] = text
+                await to_summarize.put(record)
+
+        async def summarize():
+            while True:
+                record = await to_summarize.get()
+                try:
+                    record["summary"] = await self.summarizer.process_texts(text=record.pop("text"), strategy=strategy)
+                except Exception as e:
+                    metrics.inc("pipeline_errors_total", stage="summarize")
+                    record["error"] = str(e)
+                    await done.put(record)
+                    continue
+                await (to_classify if len(classes) > 0 else done).put(record)
+
+        async def classify():
+            while True:
+                record = await to_classify.get()
+                try:
+                    metrics.inc("classify_queries_total")
+                    record["labels"], record["scores"], record["pruned"] = await self.classifier.classify_query(record["summary"], classes)
+                except Exception as e:
+                    metrics.inc("pipeline_errors_total", stage="classify")
+                    record["error"] = str(e)
+                await done.put(record)
+
+        workers = [asyncio.ensure_future(fetch()) for _ in range(min(self.fetch_concurrency, len(urls)))]
+        workers += [asyncio.ensure_future(summarize()) for _ in range(self.summarize_concurrency)]
+        workers += [asyncio.ensure_future(classify()) for _ in range(self.classify_concurrency if len(classes) > 0 else 0)]
+        metrics.inc("pipeline_urls_total", len(urls))
+        try:
+            for _ in range(len(urls)):
+                yield await done.get()
+        finally:
+            # Also reached when the client goes away mid-stream: whatever is still queued is dropped
+            for worker in workers:
+                worker.cancel()
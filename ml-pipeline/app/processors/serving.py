@@ -0,0 +1,131 @@
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Dict, Optional
+import uvicorn
+from processors.instrumentation import memory_breakdown
+
+# Set in each forked worker; None in a single-process server
+worker_index: Optional[int] = None
+
+def worker_count() -> int:
+    return max(1, int(os.getenv('SERVING_WORKERS') or 1))
+
+def torch_threads(workers: int) -> int:
+    # By default the cores are split between the workers so they do not oversubscribe them
+    return int(os.getenv('SERVING_TORCH_THREADS') or 0) or max(1, (os.cpu_count() or 1) // workers)
+
+def configure_torch(threads: int):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+def report() -> Dict[str, Any]:
+    torch = sys.modules.get("torch")
+    return {
+        "worker": worker_index,
+        "workers": worker_count(),
+        "torch_threads": torch.get_num_threads() if torch is not None else None,
+        "memory": memory_breakdown(),
+    }
+
+def serve(app: str, host: str, port: int):
+    """
+    Runs `app` ("module:attribute") with uvicorn on SERVING_WORKERS processes.
+
+    With one worker this is plain `uvicorn.run`. With more, the parent imports the
+    app, loads its models through the module's `startup.preload()`, binds the
+    socket and then forks the workers, so the weights sit in memory once and the
+    workers share those pages copy-on-write. The parent only supervises: workers
+    that die are forked again from the same loaded models, SIGTERM/SIGINT stop
+    them all.
+
+    CPU only: CUDA cannot be used across a fork, and metrics are per worker.
+    """
+    workers = worker_count()
+    threads = torch_threads(workers)
+    if workers == 1:
+        if os.getenv('SERVING_TORCH_THREADS'):
+            configure_torch(threads)
+        uvicorn.run(app, host=host, port=port)
+        return
+
+    module = importlib.import_module(app.split(":")[0])
+    module.startup.preload()
+    if "torch" in sys.modules and sys.modules["torch"].cuda.is_initialized():
+        raise RuntimeError("SERVING_WORKERS > 1 needs the models on CPU; CUDA does not survive a fork")
+    # Objects that exist now are never collected; the collector would otherwise
+    # write to every one of them and unshare the pages they live on
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET6 if host and ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host or "0.0.0.0", port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            # Never fall back into the parent's supervision loop, whatever happens
+            status = 1
+            try:
+                _run_worker(app, sock, index, threads)
+                status = 0
+            except Exception:
+                traceback.print_exc()
+            finally:
+                os._exit(status)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+    print("Serving " + app + " on " + str(host) + ":" + str(port) + " with " + str(workers) + " workers, " + str(threads) + " torch threads each")
+
+    while len(children) > 0:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print("Worker " + str(index) + " (pid " + str(pid) + ") exited with status " + str(status) + ", restarting")
+            # Do not spin when a worker dies right away, e.g. on a bad config
+            time.sleep(1)
+            spawn(index)
+    sock.close()
+
+def _run_worker(app: str, sock: socket.socket, index: int, threads: int):
+    global worker_index
+    worker_index = index
+    # The parent's handlers would forward signals to workers it no longer tracks here.
+    # The gc freeze is kept: the shared objects stay out of every collection.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    configure_torch(threads)
+    server = uvicorn.Server(uvicorn.Config(app))
+    server.run(sockets=[sock])
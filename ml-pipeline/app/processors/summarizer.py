@@ -0,0 +1,260 @@
+from typing import Dict, Generator, List, Optional, Union
+import os
+from processors.base import Processor  # Assuming base.py exists and defines Processor
+from processors.backend import load_pipeline
+from processors.tokens import DocumentTokens, TokenCounter
+from processors.dedup import NearDuplicateIndex, collapse, signature
+from processors.instrumentation import SIZE_BUCKETS, metrics, record_model_memory
+
+class Summarizer(Processor):
+    max_workers = 2
+    model_id = "marianna13/flan-t5-base-summarization"
+
+    def __init__(self, summary_max_length = 250):
+        super().__init__()
+        self.model = load_pipeline("summarization", self.model_path, self.backend)
+        record_model_memory(self.model_id, self.model.model)
+        # Access the tokenizer from the pipeline
+        self.model_max_length = self.model.tokenizer.model_max_length
+        self.summary_max_length = summary_max_length
+        # Built once and shared across executor threads instead of per request
+        self.token_counter = TokenCounter(os.path.join(self.model_path, "tokenizer.json"))
+        # "recursive" halves the text until each piece fits the model, "map_reduce" summarizes token-aligned chunks
+        self.strategy = os.getenv('SUMMARIZER_STRATEGY') or 'recursive'
+        self.batch_size = int(os.getenv('SUMMARIZER_BATCH_SIZE') or 8)
+        # Padded input tokens per generate call; by default `batch_size` full-length chunks
+        self.batch_token_budget = int(os.getenv('SUMMARIZER_BATCH_TOKEN_BUDGET') or self.batch_size * self.model_max_length)
+        # Syndicated copies of a story already summarized get that summary back
+        self.dedup = NearDuplicateIndex.from_env()
+        self.dedup_threshold = float(os.getenv('SUMMARIZER_DEDUP_THRESHOLD') or 0.8)
+
+    async def summarize(self, text: str, strategy: Optional[str] = None):
+        if not text:
+            return text
+        summaries, _ = await self._summarize_all([text], strategy)
+        if isinstance(summaries[0], Exception):
+            raise summaries[0]
+        return summaries[0]
+
+    async def summarize_batch(self, texts: List[Optional[str]], strategy: Optional[str] = None):
+        summaries, representatives = await self._summarize_all(texts, strategy)
+        # A text that fails gets a null summary and its own error instead of failing the batch
+        errors = [str(summary) if isinstance(summary, Exception) else None for summary in summaries]
+        duplicate_of = [representative if representative != i else None for i, representative in enumerate(representatives)]
+        return [None if isinstance(summary, Exception) else summary for summary in summaries], errors, duplicate_of
+
+    async def _summarize_all(self, texts: List[Optional[str]], strategy: Optional[str]):
+        strategy = strategy or self.strategy
+        if strategy not in ("recursive", "map_reduce"):
+            raise ValueError("Unknown summarization strategy: " + strategy)
+        keys = [self.cache_key(text, strategy, self.summary_max_length, self.model_max_length) if text else None for text in texts]
+        lookups = iter(await self.cache_get_many([key for key in keys if key is not None]))
+        known = {}
+        for i, key in enumerate(keys):
+            if key is not None:
+                hit, cached = next(lookups)
+                if hit:
+                    known[i] = cached
+        if all(key is None or i in known for i, key in enumerate(keys)):
+            return [known.get(i) for i in range(len(texts))], list(range(len(texts)))
+
+        # Everything left is one executor job, so its generate calls mix chunks from every text
+        summaries, representatives = await self.run_in_executor(self._summarize_unseen, texts, known, strategy)
+        await self.cache_set_many([
+            (keys[i], summaries[i]) for i in sorted(set(representatives))
+            if keys[i] is not None and i not in known and not isinstance(summaries[i], Exception)
+        ])
+        return [summaries[representative] for representative in representatives], representatives
+
+    def _summarize_unseen(self, texts: List[Optional[str]], known: Dict[int, str], strategy: str):
+        # Near-duplicates within the batch are summarized once and share the result
+        with metrics.timer("fingerprint"):
+            fingerprints = [signature(text) if text else None for text in texts]
+        representatives = collapse(fingerprints, self.dedup_threshold)
+        metrics.inc("summarize_near_duplicates_total", len(texts) - len(set(representatives)), source="batch")
+        summaries = [known.get(i) for i in range(len(texts))]
+        unseen = [i for i in sorted(set(representatives)) if texts[i] and i not in known]
+        # Not cached verbatim; may still be a near-duplicate of something summarized before
+        scope = strategy + ":" + str(self.summary_max_length)
+        if self.dedup is not None and len(unseen) > 0:
+            for i in unseen:
+                if fingerprints[i] is not None:
+                    hit, summaries[i] = self.dedup.get(fingerprints[i], scope)
+                    if hit:
+                        metrics.inc("summarize_near_duplicates_total", source="index")
+            unseen = [i for i in unseen if summaries[i] is None]
+        metrics.inc("summarize_documents_total", len(unseen), strategy=strategy)
+        for i, summary in zip(unseen, self._predict([texts[i] for i in unseen], strategy)):
+            summaries[i] = summary
+            if self.dedup is not None and fingerprints[i] is not None and not isinstance(summary, Exception):
+                self.dedup.add(fingerprints[i], scope, summary)
+        return summaries, representatives
+
+    def _recursive_summarize(self, document: DocumentTokens, start: int, end: int):
+        # Count the span's tokens from the document's offsets instead of re-encoding it
+        text = document.text[start:end]
+        tokens_count = document.count_span(start, end)
+        if tokens_count < self.summary_max_length:
+            return text
+        if tokens_count < self.model_max_length:
+            # If within limit, summarize directly
+            return (yield [text])[0]
+        else:
+            # If too long, split and summarize both halves side by side
+            half_index = start + (end - start) // 2
+            split_point = document.text.rfind('. ', start, half_index + 1) + 1 or half_index
+            part1, part2 = yield from self._together([
+                self._recursive_summarize(document, start, split_point),
+                self._recursive_summarize(document, split_point, end),
+            ])
+            combined_summary = ' '.join([part1, part2])
+            # Final summary of combined parts, if necessary
+            if self.token_counter.count(combined_summary) > self.summary_max_length:
+                return (yield [combined_summary])[0]
+            return combined_summary
+
+    def warm_up(self):
+        self._generate(["warm up"])
+
+    def _token_batches(self, lengths: List[int]) -> List[List[int]]:
+        # Indices shortest first, so each batch pads to a similar length; a batch grows while
+        # its padded size (items x longest input) stays within the token budget
+        batches = [[]]
+        for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            padded = (len(batches[-1]) + 1) * min(lengths[i], self.model_max_length)
+            if len(batches[-1]) > 0 and padded > self.batch_token_budget:
+                batches.append([])
+            batches[-1].append(i)
+        return [batch for batch in batches if len(batch) > 0]
+
+    def _generate(self, texts: List[str]) -> List[str]:
+        # Batched generate calls sized by padded tokens rather than a fixed item count,
+        # with the summaries put back in input order
+        summaries = [None] * len(texts)
+        for batch in self._token_batches(self.token_counter.count_tokens(texts)):
+            metrics.observe("batch_size", len(batch), buckets=SIZE_BUCKETS, stage="generate")
+            with metrics.timer("generate"):
+                model_results = self.model([texts[i] for i in batch], max_length=self.summary_max_length, do_sample=False, truncation=True, batch_size=len(batch))
+            for i, model_result in zip(batch, model_results):
+                summaries[i] = model_result["summary_text"]
+        return summaries
+
+    def _map_reduce_summarize(self, document: DocumentTokens):
+        # Leave room for the special tokens the pipeline adds around each chunk
+        chunk_length = self.model_max_length - self.token_counter.special_tokens
+        if document.count_span(0, len(document.text)) < self.summary_max_length:
+            return document.text
+
+        # Map: cut the article into token-aligned chunks and summarize them together
+        chunks = []
+        for start in range(0, len(document), chunk_length):
+            chunk_start = document.char_offset(start)
+            chunk_end = document.char_offset(start + chunk_length)
+            chunks.append(document.text[chunk_start:chunk_end].strip())
+        summaries = yield chunks
+
+        # Reduce: pack neighbouring summaries into inputs that fit the model and summarize them
+        # together, level by level, until the joined result fits summary_max_length.
+        while True:
+            lengths = [length - self.token_counter.special_tokens for length in self.token_counter.count_tokens(summaries)]
+            if sum(lengths) + len(lengths) - 1 <= self.summary_max_length:
+                return ' '.join(summaries)
+            groups = [[]]
+            group_length = 0
+            for summary, length in zip(summaries, lengths):
+                if len(groups[-1]) > 0 and group_length + length + 1 > chunk_length:
+                    groups.append([])
+                    group_length = 0
+                groups[-1].append(summary)
+                group_length += length + 1
+            if len(groups) == len(summaries) and len(groups) > 1:
+                # Nothing could be packed together, so no level would ever shrink; settle for
+                # one truncated pass over everything instead of looping forever.
+                return (yield [' '.join(summaries)])[0]
+            summaries = yield [' '.join(group) for group in groups]
+            if len(summaries) == 1:
+                return summaries[0]
+
+    def _plan(self, text: str, strategy: str):
+        # Encode the whole document once; both strategies count spans from its offsets
+        with metrics.timer("tokenize"):
+            document = self.token_counter.document(text)
+        if strategy == "map_reduce":
+            return (yield from self._map_reduce_summarize(document))
+        return (yield from self._recursive_summarize(document, 0, len(text)))
+
+    def _together(self, plans: List[Generator], isolate: bool = False):
+        """
+        Advances several summarization plans in lockstep.
+
+        A plan is a generator that yields the texts it needs summarized and is sent
+        their summaries back. Each round, whatever all the plans ask for goes out as
+        one request, so the generate calls behind it hold inputs from all of them.
+        With `isolate`, a plan that fails gets its exception as its result instead of
+        failing the rest, and a request that fails is retried plan by plan so only
+        the plan whose input broke it fails.
+        """
+        results = [None] * len(plans)
+        replies = [None] * len(plans)
+        pending = list(range(len(plans)))
+        while len(pending) > 0:
+            asked = []
+            for i in pending:
+                try:
+                    if isinstance(replies[i], Exception):
+                        request = plans[i].throw(replies[i])
+                    else:
+                        request = plans[i].send(replies[i])
+                    asked.append((i, request))
+                except StopIteration as stop:
+                    results[i] = stop.value
+                except Exception as error:
+                    if not isolate:
+                        raise
+                    results[i] = error
+            pending = [i for i, _ in asked]
+            if len(asked) == 0:
+                break
+            try:
+                summaries = iter((yield [text for _, request in asked for text in request]))
+                for i, request in asked:
+                    replies[i] = [next(summaries) for _ in request]
+            except Exception:
+                if not isolate:
+                    raise
+                for i, request in asked:
+                    try:
+                        replies[i] = yield request
+                    except Exception as error:
+                        replies[i] = error
+        return results
+
+    def _predict(self, texts: List[str], strategy: str) -> List[Union[str, Exception]]:
+        # Every round of generate inputs, from all texts at once, is sorted and batched by length
+        rounds = self._together([self._plan(text, strategy) for text in texts], isolate=True)
+        summaries = None
+        while True:
+            try:
+                if isinstance(summaries, Exception):
+                    request = rounds.throw(summaries)
+                else:
+                    request = rounds.send(summaries)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                summaries = self._generate(request)
+            except Exception as error:
+                summaries = error
+
+    async def process_texts(self, text: str, strategy: Optional[str] = None):
+        try:
+            reranked = await self.summarize(text.replace("\n", " "), strategy)
+            return reranked
+        except Exception as e:
+            # Handle exceptions or propagate them
+            print(e)
+            raise e
+
+    async def process_batch(self, texts: List[Optional[str]], strategy: Optional[str] = None):
+        return await self.summarize_batch([text.replace("\n", " ") if text is not None else None for text in texts], strategy)
+
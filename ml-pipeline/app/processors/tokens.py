@@ -0,0 +1,54 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple
+from tokenizers import Tokenizer
+
+class DocumentTokens:
+    """
+    A document encoded once. Token counts for any character span of the document
+    are answered from the offset mapping instead of encoding the span again.
+    """
+    def __init__(self, text: str, offsets: List[Tuple[int, int]], special_tokens: int):
+        self.text = text
+        self.offsets = offsets
+        self.special_tokens = special_tokens
+        self._starts = [start for start, _ in offsets]
+        self._ends = [end for _, end in offsets]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def count_span(self, start: int, end: int) -> int:
+        # Tokens overlapping [start, end), plus the special tokens the model input would carry
+        first = bisect_right(self._ends, start)
+        last = bisect_left(self._starts, end)
+        return max(0, last - first) + self.special_tokens
+
+    def char_offset(self, token_index: int) -> int:
+        # Character position where the token at `token_index` starts, or the end of the text
+        if token_index >= len(self.offsets):
+            return len(self.text)
+        return self._starts[token_index]
+
+class TokenCounter:
+    """
+    Fast tokenizer built once at startup and shared by all executor threads.
+    """
+    def __init__(self, path: str = "./model/tokenizer.json"):
+        self.tokenizer = Tokenizer.from_file(path)
+        self.tokenizer.no_truncation()
+        self.tokenizer.no_padding()
+        # Counts match what the model sees, e.g. the trailing </s> T5 appends
+        self.special_tokens = len(self.tokenizer.encode("").ids)
+
+    def count(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids) + self.special_tokens
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        if len(texts) == 0:
+            return []
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [len(encoding.ids) + self.special_tokens for encoding in encodings]
+
+    def document(self, text: str) -> DocumentTokens:
+        encoding = self.tokenizer.encode(text, add_special_tokens=False)
+        return DocumentTokens(text, encoding.offsets, self.special_tokens)
@@ -0,0 +1,121 @@
+from fastapi import FastAPI, Request, HTTPException
+from contextlib import asynccontextmanager
+from fastapi.responses import StreamingResponse
+import json
+import os
+from typing import List, Optional, Union
+from pydantic import BaseModel
+from fetcher import ArticleFetcher
+from processors.summarizer import Summarizer
+from processors.classifier import ZeroShotClassifier
+from processors.pipeline import Pipeline
+from processors.startup import Startup
+from processors import serving
+from processors.instrumentation import metrics_middleware, metrics_response
+from processors.admission import Rejected, admission_middleware, cancel_on_disconnect, rejected_handler
+
+# Pydantic model for the request data
+class PipelineRequest(BaseModel):
+    urls: List[Union[str, None]]
+    # Summaries are classified against these; leave empty to fetch and summarize only
+    classes: List[str] = []
+    strategy: Optional[str] = None
+
+# Both models live in one process here, each under its own directory (see preload.py)
+class PipelineSummarizer(Summarizer):
+    model_path = "./model/summarizer"
+
+class PipelineClassifier(ZeroShotClassifier):
+    model_path = "./model/classifier"
+
+def build_processors():
+    return (PipelineSummarizer(), PipelineClassifier())
+
+startup = Startup(build_processors)
+article_fetcher = ArticleFetcher()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Weights load in the background so the server can answer readiness probes meanwhile
+    startup.begin()
+    # The pooled HTTP client lives for the whole process
+    await article_fetcher.start()
+    yield
+    await article_fetcher.close()
+
+app = FastAPI(lifespan=lifespan)
+
+async def auth_middleware(request: Request, call_next):
+    auth_token = request.headers.get('auth-token')
+    # Readiness probes come from the platform and carry no token
+    if request.url.path != "/ready" and os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    response = await call_next(request)
+    return response
+
+# Registered first so auth wraps them and unauthenticated requests are never queued or profiled
+app.middleware('http')(admission_middleware)
+app.middleware('http')(metrics_middleware)
+app.middleware('http')(auth_middleware)
+# Queue full (429 + Retry-After), deadline passed (504) or client gone (499)
+app.exception_handler(Rejected)(rejected_handler)
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    return stream or "application/x-ndjson" in request.headers.get('accept', '')
+
+@app.post("/pipeline")
+async def handle_pipeline_request(request_data: PipelineRequest, request: Request, stream: bool = False):
+    summarizer, classifier = await startup.models()
+    pipeline = Pipeline.from_env(article_fetcher, summarizer, classifier)
+    records = pipeline.run(request_data.urls, request_data.classes, request_data.strategy)
+    if wants_stream(request, stream):
+        # One NDJSON record per URL as soon as it leaves the pipeline; errors stay inline
+        async def lines():
+            async for record in records:
+                yield json.dumps(record) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def collect():
+        results = [None] * len(request_data.urls)
+        async for record in records:
+            results[record["index"]] = record
+        return results
+    try:
+        results = await cancel_on_disconnect(request, collect())
+        return {
+            "status": "success",
+            "result": [record["summary"] for record in results],
+            "labels": [record["labels"] for record in results],
+            "scores": [record["scores"] for record in results],
+            "pruned": [record["pruned"] for record in results],
+            "cache": [record["cache"] for record in results],
+            "error": [record["error"] for record in results],
+        }
+    except Rejected:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/cache")
+async def handle_cache_stats_request():
+    summarizer, classifier = await startup.models()
+    return {"status": "success", "result": {"summarizer": summarizer.cache.stats(), "classifier": classifier.cache.stats()}}
+
+@app.get("/ready")
+async def handle_ready_request():
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail=startup.error or "Loading models")
+    return {"status": "success"}
+
+@app.get("/startup")
+async def handle_startup_request():
+    return {"status": "success", "result": startup.report()}
+
+@app.get("/serving")
+async def handle_serving_request():
+    # Answered by whichever worker took the connection; shared vs private memory is per worker
+    return {"status": "success", "result": serving.report()}
+
+@app.get("/metrics")
+async def handle_metrics_request():
+    return metrics_response()
@@ -0,0 +1,35 @@
+from transformers import pipeline, file_utils
+import os
+import shutil
+from onnx_export import export_onnx
+
+# The same models ml-summarizer and ml-zero-shot-classifier ship, one directory each
+for path in ("./model/summarizer", "./model/classifier"):
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+summarizer = pipeline("summarization", model="marianna13/flan-t5-base-summarization")
+# Safetensors can be memory-mapped at load time instead of unpickled
+summarizer.save_pretrained("./model/summarizer", safe_serialization=True)
+
+classifier = pipeline("zero-shot-classification", model="MoritzLaurer/deberta-v3-large-zeroshot-v1.1-all-33")
+classifier.save_pretrained("./model/classifier", safe_serialization=True)
+
+# Small sentence-embedding model for the optional label prefilter (ZERO_SHOT_PREFILTER=true)
+from sentence_transformers import SentenceTransformer
+prefilter = SentenceTransformer(os.getenv("ZERO_SHOT_PREFILTER_MODEL") or "sentence-transformers/all-MiniLM-L6-v2")
+prefilter.save("./model/classifier/prefilter", safe_serialization=True)
+
+# Export the ONNX graphs (and their int8 variants) the runtime backend will load
+backend = os.getenv("INFERENCE_BACKEND") or "torch"
+if backend != "torch":
+    export_onnx("./model/summarizer", "seq2seq", backend)
+    export_onnx("./model/classifier", "sequence-classification", backend)
+
+# Get the default cache directory path
+cache_path = file_utils.default_cache_path
+
+# Check if the cache directory exists, and if so, remove it
+if os.path.exists(cache_path) and os.getenv("IN_DOCKER_CONTAINER") == "true":
+    shutil.rmtree(cache_path)
+    print(f"Cache directory {cache_path} has been removed.")
\ No newline at end of file
@@ -0,0 +1,13 @@
+import os
+
+INFERENCE_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def inference_backend() -> str:
+    backend = os.getenv('INFERENCE_BACKEND') or 'torch'
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError("Unknown inference backend: " + backend + " (expected one of " + ", ".join(INFERENCE_BACKENDS) + ")")
+    return backend
+
+def onnx_model_path(model_path: str, backend: str) -> str:
+    # preload.py exports to <model>/onnx and quantizes to <model>/onnx-int8
+    return os.path.join(model_path, backend)
@@ -0,0 +1,37 @@
+from typing import List, Optional
+import numpy as np
+import torch
+from optimum.onnxruntime import ORTModelForSequenceClassification
+from transformers import AutoTokenizer
+
+class OnnxCrossEncoder:
+    """
+    Drop-in for the parts of sentence_transformers.CrossEncoder the reranker uses
+    (`tokenizer`, `max_length`, `predict`), backed by an exported ONNX graph.
+    """
+    def __init__(self, path: str, max_length: Optional[int] = None):
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.model = ORTModelForSequenceClassification.from_pretrained(path)
+        self.max_length = max_length
+
+    def predict(self, sentences: List[List[str]], batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True) -> np.ndarray:
+        scores = []
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            inputs = self.tokenizer(
+                [pair[0] for pair in batch],
+                [pair[1] for pair in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt",
+            )
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+            # Same default activation as CrossEncoder: sigmoid for single-logit models
+            if logits.shape[-1] == 1:
+                logits = torch.sigmoid(logits)[:, 0]
+            scores.append(logits.numpy())
+        if len(scores) == 0:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(scores)
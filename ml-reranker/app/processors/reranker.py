@@ -1,28 +1,129 @@
-from sentence_transformers import CrossEncoder
-import asyncio
-from typing import List
+import math
+import threading
+import numpy as np
+from typing import List, Optional
 from processors.base import Processor  # Importing Processor from base.py
+from processors.backend import onnx_model_path
+from processors.instrumentation import SIZE_BUCKETS, metrics, record_model_memory
 import os
 
+def cascade_size(candidates: int, top_k: Optional[int], fraction: float, min_keep: int) -> int:
+    # How many candidates reach the second stage. Without top_k every candidate needs a
+    # score on the same scale, so nothing is pruned.
+    if top_k is None or top_k <= 0:
+        return candidates
+    return min(candidates, max(top_k, min_keep, math.ceil(fraction * candidates)))
+
 class Reranker(Processor):
-    def __init__(self):
+    model_id = "cross-encoder/ms-marco-MiniLM-L-12-v2"
+    first_stage_model_id = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+    def __init__(self, batch_size: Optional[int] = None):
         super().__init__()
-        self.model = CrossEncoder("./model")
-
-    async def rerank(self, base_passage: str, queries: List[str]):
-        print("Reranking: " + str(queries) + " with base passage: " + str(base_passage))
-        loop = asyncio.get_event_loop()
-        model_inputs = [[base_passage, query] for query in queries]
-        scores = await loop.run_in_executor(self.executor, self.model.predict, model_inputs)
-        scored_indices = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
-        # Extract the sorted indices
-        sorted_indices = [(index, score) for index, score in scored_indices]
-        print("Sorted indices: " + str(sorted_indices))
-        return sorted_indices
-
-    async def process_texts(self, base_passage: str, queries: List[str]):
+        self.model = self._load(self.model_path)
+        record_model_memory(self.model_id, getattr(self.model, "model", None))
+        self.batch_size = batch_size or int(os.getenv('RERANKER_BATCH_SIZE') or 32)
+        # predict() pads and truncates through the shared Rust tokenizer; concurrent calls
+        # from executor threads fail with "Already borrowed"
+        self.predict_lock = threading.Lock()
+        # Cascade: a cheaper cross-encoder ranks the whole list and only its head is
+        # scored by the full model
+        self.first_stage = None
+        if (os.getenv('RERANKER_CASCADE') or 'false') == 'true':
+            self.first_stage = self._load(os.path.join(self.model_path, "first_stage"))
+            record_model_memory(self.first_stage_model_id, getattr(self.first_stage, "model", None))
+            self.first_stage_lock = threading.Lock()
+        self.cascade_fraction = float(os.getenv('RERANKER_CASCADE_FRACTION') or 0.5)
+        self.cascade_min_keep = int(os.getenv('RERANKER_CASCADE_MIN_KEEP') or 20)
+
+    def _load(self, path: str):
+        if self.backend == "torch":
+            # Imported here so the server starts without paying for torch up front
+            from sentence_transformers import CrossEncoder
+            return CrossEncoder(path, automodel_args={"low_cpu_mem_usage": True})
+        from processors.onnx_cross_encoder import OnnxCrossEncoder
+        return OnnxCrossEncoder(onnx_model_path(path, self.backend))
+
+    async def rerank(self, base_passage: str, queries: List[str], top_k: Optional[int] = None):
+        metrics.inc("rerank_candidates_total", len(queries))
+        keys = [self.cache_key(base_passage, query) for query in queries]
+        scores = np.empty(len(queries), dtype=np.float32)
+        missing = []
+        for i, (hit, score) in enumerate(await self.cache_get_many(keys)):
+            if hit:
+                scores[i] = score
+            else:
+                missing.append(i)
+
+        if len(missing) > 0:
+            model_inputs = [[base_passage, queries[i]] for i in missing]
+            # Cached candidates already carry full-model scores and always take part
+            keep = len(missing)
+            if self.first_stage is not None:
+                keep = max(0, cascade_size(len(queries), top_k, self.cascade_fraction, self.cascade_min_keep) - (len(queries) - len(missing)))
+            if keep < len(missing):
+                predicted = await self.run_in_executor(self._predict_cascade, model_inputs, keep)
+            else:
+                predicted = await self.run_in_executor(self._predict, model_inputs)
+            scores[missing] = predicted
+            # Pruned candidates have no full-model score to remember
+            await self.cache_set_many([(keys[i], float(scores[i])) for i in missing if np.isfinite(scores[i])])
+
+        with metrics.timer("postprocess"):
+            return self._top_k(scores, top_k)
+
+    def _predict(self, model_inputs: List[List[str]]) -> np.ndarray:
+        with self.predict_lock:
+            return self._predict_sorted(self.model, model_inputs)
+
+    def _predict_cascade(self, model_inputs: List[List[str]], keep: int) -> np.ndarray:
+        # Pruned pairs score -inf: below every kept pair, so they never reach top_k
+        with self.first_stage_lock:
+            first_scores = self._predict_sorted(self.first_stage, model_inputs, stage_prefix="first_stage_")
+        kept = np.argpartition(-first_scores, keep - 1)[:keep] if keep > 0 else np.empty(0, dtype=np.int64)
+        metrics.inc("rerank_pruned_total", len(model_inputs) - len(kept))
+        scores = np.full(len(model_inputs), -np.inf, dtype=np.float32)
+        if len(kept) > 0:
+            scores[kept] = self._predict([model_inputs[i] for i in kept])
+        return scores
+
+    def _predict_sorted(self, model, model_inputs: List[List[str]], stage_prefix: str = "") -> np.ndarray:
+        # Sort pairs by length so every batch holds similarly sized inputs and padding
+        # stays close to zero, then scatter the scores back to input order. Character
+        # length orders pairs closely enough and spares a full tokenizer pass, since
+        # predict() tokenizes every batch again anyway.
+        lengths = np.fromiter((len(pair[0]) + len(pair[1]) for pair in model_inputs), dtype=np.int64, count=len(model_inputs))
+        order = np.argsort(lengths, kind="stable")
+        metrics.observe("batch_size", len(model_inputs), buckets=SIZE_BUCKETS, stage=stage_prefix + "forward")
+        # predict() tokenizes each batch internally, so this includes the padded encode
+        with metrics.timer(stage_prefix + "forward"):
+            sorted_scores = model.predict(
+                [model_inputs[i] for i in order],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+        scores = np.empty(len(model_inputs), dtype=np.float32)
+        scores[order] = sorted_scores
+        return scores
+
+    def warm_up(self):
+        self.model.predict([["warm up", "warm up"]], show_progress_bar=False)
+        if self.first_stage is not None:
+            self.first_stage.predict([["warm up", "warm up"]], show_progress_bar=False)
+
+    def _top_k(self, scores: np.ndarray, top_k: Optional[int]):
+        if top_k is not None and 0 < top_k < len(scores):
+            # Partial sort: only the k winners get fully ordered
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(index), float(scores[index])) for index in ranked]
+
+    async def process_texts(self, base_passage: str, queries: List[str], top_k: Optional[int] = None):
         try:
-            reranked = await self.rerank(base_passage, queries)
+            reranked = await self.rerank(base_passage, queries, top_k)
             return reranked
         except Exception as e:
             # Handle exceptions or propagate them
@@ -1,35 +1,80 @@
 from fastapi import FastAPI, Request, HTTPException
+from contextlib import asynccontextmanager
 import os
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 from processors.reranker import Reranker
+from processors.startup import Startup
+from processors import serving
+from processors.instrumentation import metrics_middleware, metrics_response
+from processors.admission import Rejected, admission_middleware, cancel_on_disconnect, rejected_handler
 
 # Pydantic model for the request data
 class RerankRequest(BaseModel):
     base_passage: str
     queries: List[str]
+    top_k: Optional[int] = None
 
 class ClassifyRequest(BaseModel):
     queries: List[str]
     classes: List[str]
 
-app = FastAPI()
+startup = Startup(Reranker)
 
-reranker = Reranker()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Weights load in the background so the server can answer readiness probes meanwhile
+    startup.begin()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 async def auth_middleware(request: Request, call_next):
     auth_token = request.headers.get('auth-token')
-    if os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
+    # Readiness probes come from the platform and carry no token
+    if request.url.path != "/ready" and os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
         raise HTTPException(status_code=403, detail="Unauthorized")
     response = await call_next(request)
     return response
 
+# Registered first so auth wraps them and unauthenticated requests are never queued or profiled
+app.middleware('http')(admission_middleware)
+app.middleware('http')(metrics_middleware)
 app.middleware('http')(auth_middleware)
+# Queue full (429 + Retry-After), deadline passed (504) or client gone (499)
+app.exception_handler(Rejected)(rejected_handler)
 
 @app.post("/")
-async def handle_rerank_request(request_data: RerankRequest):
+async def handle_rerank_request(request_data: RerankRequest, request: Request):
+    reranker = await startup.models()
     try:
-        results = await reranker.process_texts(base_passage=request_data.base_passage, queries=request_data.queries)
+        results = await cancel_on_disconnect(request, reranker.process_texts(base_passage=request_data.base_passage, queries=request_data.queries, top_k=request_data.top_k))
         return {"status": "success", "result": [result[0] for result in results], "scores": [result[1] for result in results]}
+    except Rejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/cache")
+async def handle_cache_stats_request():
+    reranker = await startup.models()
+    return {"status": "success", "result": reranker.cache.stats()}
+
+@app.get("/ready")
+async def handle_ready_request():
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail=startup.error or "Loading models")
+    return {"status": "success"}
+
+@app.get("/startup")
+async def handle_startup_request():
+    return {"status": "success", "result": startup.report()}
+
+@app.get("/serving")
+async def handle_serving_request():
+    # Answered by whichever worker took the connection; shared vs private memory is per worker
+    return {"status": "success", "result": serving.report()}
+
+@app.get("/metrics")
+async def handle_metrics_request():
+    return metrics_response()
@@ -0,0 +1,90 @@
+"""
+Offline recall@k of the cascade against single-stage reranking.
+
+    python cascade_report.py samples.jsonl --k 10 --fractions 0.25,0.5,0.75
+
+Each line of the input is a rerank request ({"base_passage": ..., "queries": [...]},
+e.g. captured from semantic-search). Every pair is scored once by the full model
+(./model) and once by the first stage (./model/first_stage); each cascade setting
+is then replayed from those scores, so the report costs one pass per model no
+matter how many settings are compared. recall@k is the share of the single-stage
+top k that the cascade also returns.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from processors.reranker import cascade_size  # noqa: E402
+
+def load_samples(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def score(model, base_passage: str, queries, batch_size: int):
+    started_at = time.perf_counter()
+    scores = model.predict([[base_passage, query] for query in queries], batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+    return np.asarray(scores, dtype=np.float32), time.perf_counter() - started_at
+
+def top(scores: np.ndarray, k: int):
+    return set(np.argsort(-scores, kind="stable")[:k].tolist())
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cascade reranking against the full model on recorded requests.")
+    parser.add_argument("samples", help="JSONL file of rerank requests")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--fractions", default="0.25,0.5,0.75", help="comma separated RERANKER_CASCADE_FRACTION values")
+    parser.add_argument("--min-keep", type=int, default=20, help="RERANKER_CASCADE_MIN_KEEP")
+    parser.add_argument("--model", default="./model")
+    parser.add_argument("--first-stage-model", default="./model/first_stage")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    from sentence_transformers import CrossEncoder
+    model = CrossEncoder(args.model)
+    first_stage = CrossEncoder(args.first_stage_model)
+    samples = load_samples(args.samples)
+    fractions = [float(fraction) for fraction in args.fractions.split(",")]
+
+    full_seconds = first_seconds = 0.0
+    recalls = {fraction: [] for fraction in fractions}
+    kept = {fraction: 0 for fraction in fractions}
+    pairs = 0
+    for sample in samples:
+        queries = sample["queries"]
+        if len(queries) == 0:
+            continue
+        full_scores, seconds = score(model, sample["base_passage"], queries, args.batch_size)
+        full_seconds += seconds
+        first_scores, seconds = score(first_stage, sample["base_passage"], queries, args.batch_size)
+        first_seconds += seconds
+        pairs += len(queries)
+        k = min(args.k, len(queries))
+        expected = top(full_scores, k)
+        for fraction in fractions:
+            keep = cascade_size(len(queries), k, fraction, args.min_keep)
+            survivors = np.argsort(-first_scores, kind="stable")[:keep]
+            cascade_scores = np.full(len(queries), -np.inf, dtype=np.float32)
+            cascade_scores[survivors] = full_scores[survivors]
+            recalls[fraction].append(len(expected & top(cascade_scores, k)) / k)
+            kept[fraction] += keep
+
+    if pairs == 0:
+        print("No candidates in " + args.samples)
+        return
+    # Cost relative to single-stage: every pair through the first stage plus the kept ones through the full model
+    full_per_pair = full_seconds / pairs
+    first_per_pair = first_seconds / pairs
+    print("requests: " + str(len(recalls[fractions[0]])) + ", pairs: " + str(pairs) + ", k: " + str(args.k) + ", min keep: " + str(args.min_keep))
+    print("full model %.2f ms/pair, first stage %.2f ms/pair" % (full_per_pair * 1000, first_per_pair * 1000))
+    print("fraction  recall@k  min recall@k  second stage  est. cost")
+    for fraction in fractions:
+        share = kept[fraction] / pairs
+        cost = (first_per_pair + share * full_per_pair) / full_per_pair if full_per_pair > 0 else 0.0
+        print("%-8s  %-8.3f  %-12.3f  %-12s  %.0f%%" % (fraction, np.mean(recalls[fraction]), np.min(recalls[fraction]), "%.0f%%" % (share * 100), cost * 100))
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,24 @@ from sentence_transformers import CrossEncoder
 from transformers import file_utils
 import os
 import shutil
+from onnx_export import export_onnx
 
 if not os.path.exists("./model"):
     os.makedirs("./model")
 
 model = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-12-v2')
-model.save_pretrained("./model")
+# Safetensors can be memory-mapped at load time instead of unpickled
+model.save_pretrained("./model", safe_serialization=True)
+
+# Cheaper first stage for RERANKER_CASCADE=true; small enough to always ship
+first_stage = CrossEncoder(os.getenv("RERANKER_FIRST_STAGE_MODEL") or 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+first_stage.save_pretrained("./model/first_stage", safe_serialization=True)
+
+# Export the ONNX graph (and its int8 variant) the runtime backend will load
+backend = os.getenv("INFERENCE_BACKEND") or "torch"
+if backend != "torch":
+    export_onnx("./model", "sequence-classification", backend)
+    export_onnx("./model/first_stage", "sequence-classification", backend)
 
 # Get the default cache directory path
 cache_path = file_utils.default_cache_path
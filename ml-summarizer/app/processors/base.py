@@ -1,10 +1,63 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Callable, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
+from processors.admission import AdmissionController
+from processors.backend import inference_backend
+from processors.cache import ResultCache
+from processors.instrumentation import metrics
 
 class Processor(ABC):
+    max_workers = 5  # Adjust max_workers as needed
+    model_id = "./model"
+    # Where the weights were saved by preload.py; services hosting several processors override it
+    model_path = "./model"
+
     def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=2)  # Adjust max_workers as needed
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # Work waits (bounded, by priority) here rather than in the executor's unbounded queue
+        self.admission = AdmissionController.from_env(self.executor, self.max_workers)
+        self.backend = inference_backend()
+        # torch and quantized outputs differ slightly, so they never share cache entries
+        self.cache = ResultCache.from_env(self.model_id + ":" + self.backend)
+        # The SQLite tier runs here rather than on the event loop or a model worker
+        self.cache_executor = ThreadPoolExecutor(max_workers=1)
+        processor = type(self).__name__
+        metrics.gauge("executor_queue_depth", lambda: self.admission.queued, processor=processor)
+        # `hits` already includes hits served from the disk tier
+        metrics.gauge("result_cache_hits_total", lambda: self.cache.hits, kind="counter", processor=processor)
+        metrics.gauge("result_cache_disk_hits_total", lambda: self.cache.disk_hits, kind="counter", processor=processor)
+        metrics.gauge("result_cache_misses_total", lambda: self.cache.misses, kind="counter", processor=processor)
+        metrics.gauge("result_cache_hit_rate", lambda: self.cache.stats()["hit_rate"], processor=processor)
+
+    def cache_key(self, *parts) -> str:
+        # Keyed on model id + inputs + parameters so a model swap never serves stale results
+        return self.cache.make_key(*parts)
+
+    async def cache_get_many(self, keys: List[str]) -> List[Tuple[bool, Any]]:
+        return await self._run_cache(self.cache.get_many, keys)
+
+    async def cache_set_many(self, items: List[Tuple[str, Any]]):
+        await self._run_cache(self.cache.set_many, items)
+
+    async def _run_cache(self, fn: Callable[..., Any], *args) -> Any:
+        # Memory-only lookups are cheap enough to answer on the loop
+        if not self.cache.disk_path:
+            return fn(*args)
+        return await asyncio.get_event_loop().run_in_executor(self.cache_executor, fn, *args)
+
+    async def run_in_executor(self, fn: Callable[..., Any], *args, priority: Optional[int] = None) -> Any:
+        # Time spent waiting for a free worker is recorded apart from the work itself
+        submitted_at = time.perf_counter()
+        def timed():
+            metrics.observe("stage_duration_seconds", time.perf_counter() - submitted_at, stage="queue_wait")
+            return fn(*args)
+        return await self.admission.run(timed, priority=priority)
+
+    def warm_up(self):
+        # Subclasses run one tiny inference here so the first real request is not the slow one
+        pass
 
     @abstractmethod
     def process_texts(self, texts: List[str]) -> List[str]:
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+class ResultCache:
+    """
+    Two-tier cache for model results.
+
+    The first tier is an in-memory LRU bounded by `max_entries`, the second an
+    optional SQLite file at `disk_path` that survives restarts. Both tiers expire
+    entries after `ttl` seconds (0 disables expiry). Values must be JSON
+    serializable. All methods are safe to call from executor threads; the disk
+    tier has its own lock, so memory lookups and stats never wait on SQLite.
+    """
+    def __init__(self, namespace: str, max_entries: int = 10000, ttl: float = 0, disk_path: Optional[str] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.disk_path = disk_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+    @classmethod
+    def from_env(cls, namespace: str):
+        return cls(
+            namespace,
+            max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES') or 10000),
+            ttl=float(os.getenv('RESULT_CACHE_TTL_SECONDS') or 0),
+            disk_path=os.getenv('RESULT_CACHE_DISK_PATH') or None,
+        )
+
+    def make_key(self, *parts: Any) -> str:
+        payload = json.dumps([self.namespace, *parts], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Opened on first use in each process: SQLite connections must not cross fork(),
+        # and serving workers are forked after the processors are built
+        if not self.disk_path:
+            return None
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[str]) -> List[Tuple[bool, Any]]:
+        # Memory first; whatever it misses is looked up on disk in one query
+        results = [(False, None)] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                if self.max_entries > 0 and key in self._entries:
+                    value, stored_at = self._entries[key]
+                    if not self._expired(stored_at):
+                        self._entries.move_to_end(key)
+                        results[i] = (True, value)
+                        continue
+                    del self._entries[key]
+                missing.append(i)
+        rows = self._load([keys[i] for i in missing]) if self.disk_path and len(missing) > 0 else {}
+        with self._lock:
+            disk_hits = 0
+            for i in missing:
+                row = rows.get(keys[i])
+                if row is not None and not self._expired(row[1]):
+                    value = json.loads(row[0])
+                    self._remember(keys[i], value, row[1])
+                    results[i] = (True, value)
+                    disk_hits += 1
+            self.hits += len(keys) - len(missing) + disk_hits
+            self.disk_hits += disk_hits
+            self.misses += len(missing) - disk_hits
+        return results
+
+    def set(self, key: str, value: Any):
+        self.set_many([(key, value)])
+
+    def set_many(self, items: List[Tuple[str, Any]]):
+        # One transaction, so a whole request's results cost a single commit
+        stored_at = time.time()
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value, stored_at)
+        if not self.disk_path or len(items) == 0:
+            return
+        with self._db_lock:
+            db = self._connection()
+            db.executemany(
+                "INSERT OR REPLACE INTO results (key, value, stored_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), stored_at) for key, value in items],
+            )
+            db.commit()
+
+    def _load(self, keys: List[str]):
+        rows = {}
+        with self._db_lock:
+            db = self._connection()
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                query = "SELECT key, value, stored_at FROM results WHERE key IN (" + ",".join("?" * len(chunk)) + ")"
+                for key, value, stored_at in db.execute(query, chunk):
+                    rows[key] = (value, stored_at)
+        return rows
+
+    def _remember(self, key: str, value: Any, stored_at: float):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            }
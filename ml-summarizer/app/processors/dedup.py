@@ -0,0 +1,163 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+# Universal hashing modulo a prime just below 2**32 keeps every product inside uint64
+PRIME = (1 << 32) - 5
+WORD = re.compile(r"\w+")
+NUM_PERM = 128
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Fixed per seed, so signatures stay comparable across requests and restarts
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    return a, b
+
+def signature(text: str, num_perm: int = NUM_PERM, shingle_size: int = 5, seed: int = 1) -> Optional[np.ndarray]:
+    """
+    MinHash signature of the text's word shingles, or None when it has no words.
+
+    Two signatures agree at each position with probability equal to the Jaccard
+    similarity of the shingle sets, so syndicated copies of the same story (with a
+    different byline, boilerplate or a trimmed paragraph) stay close.
+    """
+    words = WORD.findall(text.lower())
+    if len(words) == 0:
+        return None
+    span = min(shingle_size, len(words))
+    shingles = {" ".join(words[i:i + span]) for i in range(len(words) - span + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    a, b = _permutations(num_perm, seed)
+    # (permutations, shingles) -> the smallest permuted hash per permutation
+    return ((a[:, None] * hashes[None, :] + b[:, None]) % PRIME).min(axis=1)
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    return float(np.mean(first == second))
+
+def collapse(signatures: List[Optional[np.ndarray]], threshold: float) -> List[int]:
+    # Index of the earliest near-duplicate for every item (itself when there is none)
+    representatives = []
+    keys = [i for i, sig in enumerate(signatures) if sig is not None]
+    matrix = np.stack([signatures[i] for i in keys]) if len(keys) > 0 else None
+    position = {item: row for row, item in enumerate(keys)}
+    for i, sig in enumerate(signatures):
+        representative = i
+        if sig is not None:
+            row = position[i]
+            agreeing = np.flatnonzero((matrix[:row] == matrix[row]).mean(axis=1) >= threshold)
+            for earlier in agreeing:
+                # Chain to the first item of a group, not to another duplicate
+                if representatives[keys[earlier]] == keys[earlier]:
+                    representative = keys[earlier]
+                    break
+        representatives.append(representative)
+    return representatives
+
+class NearDuplicateIndex:
+    """
+    LSH index over MinHash signatures of recently summarized documents.
+
+    Signatures are cut into `bands` bands; documents sharing any band are
+    candidates, and a candidate whose estimated Jaccard similarity reaches
+    `threshold` is a hit. `scope` keeps results made with different settings
+    (strategy, summary length) apart. Bounded by `max_entries` (LRU) and `ttl`
+    seconds (0 disables expiry). Safe to call from executor threads.
+    """
+    def __init__(self, threshold: float = 0.8, bands: int = 32, max_entries: int = 10000, ttl: float = 0):
+        if NUM_PERM % bands != 0:
+            raise ValueError("bands must divide the signature length " + str(NUM_PERM))
+        self.threshold = threshold
+        self.bands = bands
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, str, Any, float]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, str, bytes], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        max_entries = int(os.getenv('SUMMARIZER_DEDUP_MAX_ENTRIES') or 10000)
+        if max_entries <= 0:
+            return None
+        return cls(
+            threshold=float(os.getenv('SUMMARIZER_DEDUP_THRESHOLD') or 0.8),
+            max_entries=max_entries,
+            ttl=float(os.getenv('SUMMARIZER_DEDUP_TTL_SECONDS') or 0),
+        )
+
+    def _band_keys(self, sig: np.ndarray, scope: str) -> List[Tuple[int, str, bytes]]:
+        return [(band, scope, rows.tobytes()) for band, rows in enumerate(np.split(sig, self.bands))]
+
+    def get(self, sig: Optional[np.ndarray], scope: str) -> Tuple[bool, Any]:
+        if sig is None:
+            return (False, None)
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(sig, scope):
+                candidates |= self._buckets.get(key, set())
+            best, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                other, _, value, stored_at = self._entries[entry_id]
+                if self._expired(stored_at):
+                    self._evict(entry_id)
+                    continue
+                score = similarity(sig, other)
+                if score >= best_similarity:
+                    best, best_similarity = entry_id, score
+            if best is None:
+                self.misses += 1
+                return (False, None)
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return (True, self._entries[best][2])
+
+    def add(self, sig: Optional[np.ndarray], scope: str, value: Any):
+        if sig is None:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (sig, scope, value, time.time())
+            for key in self._band_keys(sig, scope):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+            # Entries never matched again are not reached through get(); drop the expired
+            # ones at the cold end of the LRU so the index does not keep growing with them
+            while len(self._entries) > 0:
+                coldest = next(iter(self._entries))
+                if not self._expired(self._entries[coldest][3]):
+                    break
+                self._evict(coldest)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    def _evict(self, entry_id: int):
+        sig, scope, _, _ = self._entries.pop(entry_id)
+        for key in self._band_keys(sig, scope):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if len(bucket) == 0:
+                    del self._buckets[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+        }
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Union
+
+class Startup:
+    """
+    Builds a service's models off the event loop once the app is up.
+
+    Uvicorn can accept connections (and answer readiness probes) while the weights
+    are still being loaded; handlers await `models()` and are served as soon as
+    loading finishes. Each phase is timed so cold starts can be broken down.
+
+    With several workers the weights are loaded once by `preload()` in the parent
+    process instead, and every forked worker starts from those (see serving.py).
+    """
+    def __init__(self, build: Callable[[], Any]):
+        self.build = build
+        self.created_at = time.perf_counter()
+        self.phases = OrderedDict()
+        self.error: Union[str, None] = None
+        self._future: Union[asyncio.Future, None] = None
+        self._preloaded: Any = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started_at
+
+    def preload(self):
+        # Runs in the serving parent, before any event loop or worker exists
+        self.phases["app_start"] = time.perf_counter() - self.created_at
+        with self.phase("model_load"):
+            self._preloaded = self.build()
+
+    def begin(self):
+        if self._preloaded is None:
+            self.phases["app_start"] = time.perf_counter() - self.created_at
+        loop = asyncio.get_event_loop()
+        self._future = loop.run_in_executor(None, self._build)
+
+    def _build(self) -> Any:
+        try:
+            if self._preloaded is not None:
+                models = self._preloaded
+            else:
+                with self.phase("model_load"):
+                    models = self.build()
+            if (os.getenv('WARM_UP_ON_STARTUP') or 'true') == 'true':
+                # One tiny inference faults the weights in and spins up torch's thread pools.
+                # Preloaded workers do this after the fork, each with its own pools.
+                with self.phase("warm_up"):
+                    for model in (models if isinstance(models, tuple) else (models,)):
+                        model.warm_up()
+            return models
+        except Exception as e:
+            self.error = str(e)
+            raise
+
+    @property
+    def ready(self) -> bool:
+        return self._future is not None and self._future.done() and self._future.exception() is None
+
+    async def models(self) -> Any:
+        if self._future is None:
+            raise RuntimeError("Models are not being loaded")
+        # Shielded so a cancelled request does not cancel loading for everyone else
+        return await asyncio.shield(self._future)
+
+    def report(self):
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "phases": dict(self.phases),
+            "total_seconds": sum(self.phases.values()),
+        }
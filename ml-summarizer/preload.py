@@ -1,12 +1,19 @@
 from transformers import pipeline, file_utils
 import os
 import shutil
+from onnx_export import export_onnx
 
 if not os.path.exists("./model"):
     os.makedirs("./model")
 
 model = pipeline("summarization", model="marianna13/flan-t5-base-summarization")
-model.save_pretrained("./model")
+# Safetensors can be memory-mapped at load time instead of unpickled
+model.save_pretrained("./model", safe_serialization=True)
+
+# Export the ONNX graph (and its int8 variant) the runtime backend will load
+backend = os.getenv("INFERENCE_BACKEND") or "torch"
+if backend != "torch":
+    export_onnx("./model", "seq2seq", backend)
 
 # Get the default cache directory path
 cache_path = file_utils.default_cache_path
@@ -0,0 +1,55 @@
+import pytest
+from tokenizers import Tokenizer, decoders, models, normalizers, pre_tokenizers, processors, trainers
+from transformers import PreTrainedTokenizerFast, T5Config, T5ForConditionalGeneration
+from processors.summarizer import Summarizer
+
+CORPUS = [
+    "the quick brown fox jumps over the lazy dog.",
+    "news about politics, the economy, sports, the weather and tech.",
+    "this example is about something else entirely.",
+]
+
+def save_tiny_t5(path: str):
+    # Randomly initialised and small enough to build in a second; outputs are
+    # nonsense but deterministic, which is all the batching logic needs
+    tokenizer = Tokenizer(models.WordPiece(unk_token="<unk>"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.train_from_iterator(CORPUS * 50, trainers.WordPieceTrainer(vocab_size=300, special_tokens=["<pad>", "</s>", "<unk>"]))
+    tokenizer.post_processor = processors.TemplateProcessing(single="$A </s>", special_tokens=[("</s>", 1)])
+    tokenizer.decoder = decoders.WordPiece()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="<unk>", pad_token="<pad>", eos_token="</s>", model_max_length=64).save_pretrained(path)
+    config = T5Config(vocab_size=300, d_model=32, d_kv=8, d_ff=64, num_layers=2, num_heads=2, decoder_start_token_id=0, pad_token_id=0, eos_token_id=1)
+    T5ForConditionalGeneration(config).save_pretrained(path)
+
+class RecordingPipeline:
+    # Wraps the real pipeline and keeps the inputs of every generate call
+    def __init__(self, pipeline, fail_on: str = None):
+        self.pipeline = pipeline
+        self.fail_on = fail_on
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        if self.fail_on is not None and any(self.fail_on in text for text in texts):
+            raise ValueError("cannot summarize " + self.fail_on)
+        return self.pipeline(texts, **kwargs)
+
+@pytest.fixture(scope="session")
+def tiny_model_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("summarizer") / "model")
+    save_tiny_t5(path)
+    return path
+
+@pytest.fixture
+def make_summarizer(tiny_model_path, monkeypatch):
+    monkeypatch.setenv("INFERENCE_BACKEND", "torch")
+    monkeypatch.delenv("RESULT_CACHE_DISK_PATH", raising=False)
+    monkeypatch.setattr(Summarizer, "model_path", tiny_model_path)
+
+    def make(summary_max_length: int = 16, fail_on: str = None) -> Summarizer:
+        # 16-token summaries of a 64-token model, so long texts need several rounds
+        summarizer = Summarizer(summary_max_length=summary_max_length)
+        summarizer.model = RecordingPipeline(summarizer.model, fail_on)
+        return summarizer
+    return make
@@ -0,0 +1,103 @@
+import asyncio
+import random
+import pytest
+from fastapi.testclient import TestClient
+import server
+from processors.startup import Startup
+
+FOX = "the quick brown fox jumps over the lazy dog. " * 30
+NEWS = "news about politics, the economy, sports, the weather and tech. " * 25
+EXAMPLE = "this example is about something else entirely. " * 20
+SHORT = "the lazy dog."
+
+def origins(call):
+    # Which of the long texts each input of a generate call was cut from
+    markers = {"fox": "FOX", "politics": "NEWS", "example": "EXAMPLE"}
+    return {name for text in call for marker, name in markers.items() if marker in text}
+
+def test_token_batches_stay_within_budget(make_summarizer):
+    summarizer = make_summarizer()
+    summarizer.batch_token_budget = 256
+    rng = random.Random(0)
+    lengths = [rng.randint(1, 64) for _ in range(200)]
+    batches = summarizer._token_batches(lengths)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) * max(lengths[i] for i in batch) <= 256
+
+def test_token_batches_group_similar_lengths(make_summarizer):
+    summarizer = make_summarizer()
+    summarizer.batch_token_budget = 128
+    assert summarizer._token_batches([60, 2, 40, 4, 3, 62]) == [[1, 4, 3], [2, 0], [5]]
+
+def test_lengths_are_capped_at_model_max_length(make_summarizer):
+    # Inputs are truncated to model_max_length, so longer ones pad no further than that
+    summarizer = make_summarizer()
+    summarizer.batch_token_budget = 128
+    assert summarizer._token_batches([2000, 3000, 5]) == [[2, 0], [1]]
+
+@pytest.mark.parametrize("strategy", ["recursive", "map_reduce"])
+def test_generate_calls_mix_texts(make_summarizer, strategy):
+    summarizer = make_summarizer()
+    asyncio.run(summarizer.summarize_batch([FOX, NEWS, EXAMPLE], strategy))
+    assert any(len(origins(call)) > 1 for call in summarizer.model.calls)
+
+@pytest.mark.parametrize("strategy", ["recursive", "map_reduce"])
+def test_batch_matches_texts_summarized_alone(make_summarizer, strategy):
+    # One input per generate call on both sides, so padding cannot change the outputs
+    batched = make_summarizer()
+    batched.batch_token_budget = batched.model_max_length
+    alone = make_summarizer()
+    alone.batch_token_budget = alone.model_max_length
+    texts = [NEWS, SHORT, FOX, EXAMPLE]
+    summaries, errors, _ = asyncio.run(batched.summarize_batch(texts, strategy))
+    assert summaries == [asyncio.run(alone.summarize(text, strategy)) for text in texts]
+    assert summaries[1] == SHORT
+    assert errors == [None] * len(texts)
+
+def test_duplicates_are_summarized_once(make_summarizer):
+    once = make_summarizer()
+    asyncio.run(once.summarize_batch([FOX]))
+    summarizer = make_summarizer()
+    # A trimmed syndicated copy is a near-duplicate, not a cache hit
+    copy = FOX[:-len("the lazy dog. ")]
+    summaries, _, duplicate_of = asyncio.run(summarizer.summarize_batch([FOX, NEWS, FOX, copy]))
+    assert duplicate_of == [None, None, 0, 0]
+    assert summaries[0] == summaries[2] == summaries[3]
+    def fox_inputs(calls):
+        return [text for call in calls for text in call if "fox" in text]
+    assert fox_inputs(summarizer.model.calls) == fox_inputs(once.model.calls)
+
+def test_null_and_empty_texts_get_null_summaries(make_summarizer):
+    summarizer = make_summarizer()
+    summaries, errors, duplicate_of = asyncio.run(summarizer.summarize_batch([None, SHORT, "", None]))
+    assert summaries == [None, SHORT, None, None]
+    assert errors == [None] * 4
+    assert duplicate_of == [None] * 4
+    assert summarizer.model.calls == []
+
+def test_failing_text_does_not_fail_the_batch(make_summarizer):
+    summarizer = make_summarizer(fail_on="poison")
+    poisoned = "poison " + EXAMPLE
+    summaries, errors, _ = asyncio.run(summarizer.summarize_batch([FOX, poisoned, NEWS]))
+    assert summaries[1] is None
+    assert "cannot summarize poison" in errors[1]
+    assert summaries[0] and summaries[2]
+    assert errors[0] is None and errors[2] is None
+    # The failure is not cached; the other texts are
+    assert asyncio.run(summarizer.cache_get_many([summarizer.cache_key(FOX, "recursive", 16, 64)]))[0][0]
+    with pytest.raises(ValueError):
+        asyncio.run(summarizer.summarize(poisoned))
+
+def test_batch_route(make_summarizer, monkeypatch):
+    summarizer = make_summarizer()
+    monkeypatch.setattr(server, "startup", Startup(lambda: summarizer))
+    monkeypatch.delenv("AUTH_TOKEN", raising=False)
+    with TestClient(server.app) as client:
+        response = client.post("/batch", json={"texts": [FOX, None, SHORT, FOX]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["result"][1] is None and body["result"][2] == SHORT
+    assert body["result"][3] == body["result"][0]
+    assert body["error"] == [None] * 4
+    assert body["duplicate_of"] == [None, None, None, 0]
@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 import os
-import uvicorn
+from processors.serving import serve
 
 load_dotenv()
 
@@ -12,4 +12,4 @@ if __name__ == "__main__":
     port = parsed_url.port
     print(hostname)
     print("FuckfuckfuckFuckfuckfuck")
-    uvicorn.run("server:app", host=hostname, port=int(os.getenv('ZERO_SHOT_CLASSIFIER_PORT')))
\ No newline at end of file
+    serve("server:app", host=hostname, port=int(os.getenv('ZERO_SHOT_CLASSIFIER_PORT')))
\ No newline at end of file
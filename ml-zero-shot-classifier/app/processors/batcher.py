@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+import math
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from processors.admission import INTERACTIVE, DeadlineExceeded, Overloaded, request_deadline, request_priority
+from processors.instrumentation import SIZE_BUCKETS, metrics
+
+# (priority, sequence, item, future, enqueued_at, deadline)
+QueuedItem = Tuple[int, int, Any, asyncio.Future, float, Optional[float]]
+
+class MicroBatcher:
+    """
+    Coalesces work items from concurrent callers into padded batches.
+
+    Items are queued together with a future. A single background task drains the
+    queue until either `max_batch_size` items are collected or `max_wait_ms` has
+    elapsed since the first item arrived, runs `predict_batch` once through `run`
+    (the processor's admission-controlled executor) and resolves each caller's
+    future with its own result. Only one batch is in flight at a time, so the model
+    never competes with itself for torch threads.
+
+    The queue is ordered by request priority, so interactive items overtake bulk
+    ones, and holds at most `max_queued_items`; items whose request deadline passed
+    or whose caller went away are dropped before they reach the model.
+    """
+    def __init__(self, predict_batch: Callable[[List[Any]], List[Any]], run: Callable[..., Awaitable[Any]], max_batch_size: int = 64, max_wait_ms: float = 10.0, max_queued_items: int = 4096):
+        self.predict_batch = predict_batch
+        self.run = run
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queued_items = max_queued_items
+        self.batch_seconds = 0.1
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._sequence = itertools.count()
+
+    def _ensure_worker(self):
+        # The queue and the worker must live on the running event loop, which does
+        # not exist yet when the processor is constructed at import time.
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.PriorityQueue()
+            self._worker = asyncio.get_event_loop().create_task(self._run())
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        if len(items) == 0:
+            return []
+        self._ensure_worker()
+        queued = self._queue.qsize()
+        if queued + len(items) > self.max_queued_items:
+            # Batches ahead of this request at the recently observed pace
+            raise Overloaded(max(1, math.ceil(self.batch_seconds * (queued + len(items)) / self.max_batch_size)))
+        loop = asyncio.get_event_loop()
+        priority = request_priority.get()
+        deadline = request_deadline.get()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self._queue.put_nowait((priority, next(self._sequence), item, future, time.perf_counter(), deadline))
+            futures.append(future)
+        try:
+            return await asyncio.gather(*futures)
+        finally:
+            # A cancelled caller leaves its queued items behind; mark them so they are skipped
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+
+    async def _collect(self) -> List[QueuedItem]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued before waiting on the clock
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        # This task outlives the request that started it; it must not inherit that
+        # request's priority or deadline
+        request_priority.set(INTERACTIVE)
+        request_deadline.set(None)
+        while True:
+            batch = await self._collect()
+            now = time.monotonic()
+            live = []
+            for priority, _, item, future, enqueued_at, deadline in batch:
+                if future.done():
+                    # Callers that went away do not need their items scored
+                    continue
+                if deadline is not None and deadline <= now:
+                    future.set_exception(DeadlineExceeded())
+                    continue
+                live.append((priority, item, future, enqueued_at))
+            if len(live) == 0:
+                continue
+            dispatched_at = time.perf_counter()
+            for _, _, _, enqueued_at in live:
+                metrics.observe("stage_duration_seconds", dispatched_at - enqueued_at, stage="batch_wait")
+            metrics.observe("batch_size", len(live), buckets=SIZE_BUCKETS, stage="forward")
+            batch = [(item, future) for _, item, future, _ in live]
+            try:
+                results = await self.run(self.predict_batch, [item for item, _ in batch], priority=min(priority for priority, _, _, _ in live))
+                self.batch_seconds = 0.8 * self.batch_seconds + 0.2 * (time.perf_counter() - dispatched_at)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from processors.instrumentation import metrics
+
+class LabelPrefilter:
+    """
+    Cheap first stage for zero-shot classification with many labels.
+
+    A small sentence-embedding model scores a query against every candidate label
+    and only the most similar labels are handed to the NLI model. Label embeddings
+    are computed once per label and kept (the `max_labels` most recently used), so
+    the per-query cost is a single short encode plus a matrix-vector product however
+    long the tag list grows.
+
+    `top_n` keeps the N most similar labels and `min_similarity` drops labels whose
+    cosine similarity falls below the floor; either can be left unset.
+    """
+    def __init__(self, model_path: str, top_n: Optional[int] = 10, min_similarity: Optional[float] = None, max_labels: int = 10000):
+        # Imported here so the server starts without paying for torch up front
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_path)
+        self.top_n = top_n
+        self.min_similarity = min_similarity
+        self.max_labels = max_labels
+        # Labels are free-form caller input, so the store is an LRU rather than growing forever
+        self._label_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model_path: str) -> Optional["LabelPrefilter"]:
+        if (os.getenv('ZERO_SHOT_PREFILTER') or 'false') != 'true':
+            return None
+        top_n = os.getenv('ZERO_SHOT_PREFILTER_TOP_N')
+        min_similarity = os.getenv('ZERO_SHOT_PREFILTER_MIN_SIMILARITY')
+        return cls(
+            model_path,
+            top_n=int(top_n) if top_n else 10,
+            min_similarity=float(min_similarity) if min_similarity else None,
+            max_labels=int(os.getenv('ZERO_SHOT_PREFILTER_MAX_LABELS') or 10000),
+        )
+
+    def config(self) -> List:
+        # Part of the classifier's cache key, so retuning never serves stale results
+        return [self.top_n, self.min_similarity]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+
+    def _labels_matrix(self, classes: List[str]) -> np.ndarray:
+        with self._lock:
+            embeddings: Dict[str, np.ndarray] = {}
+            missing = []
+            for label in dict.fromkeys(classes):
+                if label in self._label_embeddings:
+                    self._label_embeddings.move_to_end(label)
+                    embeddings[label] = self._label_embeddings[label]
+                else:
+                    missing.append(label)
+            if len(missing) > 0:
+                for label, embedding in zip(missing, self._encode(missing)):
+                    embeddings[label] = self._label_embeddings[label] = embedding
+                # This request's labels are already in hand even if they do not all fit
+                while len(self._label_embeddings) > self.max_labels:
+                    self._label_embeddings.popitem(last=False)
+            return np.stack([embeddings[label] for label in classes])
+
+    def select(self, query: str, classes: List[str]) -> Tuple[List[str], List[str]]:
+        # Returns (kept, pruned); both keep the caller's label order
+        if self.min_similarity is None and (self.top_n is None or len(classes) <= self.top_n):
+            return (list(classes), [])
+
+        with metrics.timer("prefilter"):
+            similarities = self._labels_matrix(classes) @ self._encode([query])[0]
+        keep = np.ones(len(classes), dtype=bool)
+        if self.top_n is not None and len(classes) > self.top_n:
+            keep[:] = False
+            keep[np.argpartition(-similarities, self.top_n - 1)[:self.top_n]] = True
+        if self.min_similarity is not None:
+            keep &= similarities >= self.min_similarity
+
+        kept = [label for label, k in zip(classes, keep) if k]
+        pruned = [label for label, k in zip(classes, keep) if not k]
+        return (kept, pruned)
+
+    def warm_up(self):
+        self._encode(["warm up"])
@@ -1,8 +1,15 @@
 from fastapi import FastAPI, Request, HTTPException
+from contextlib import asynccontextmanager
+from fastapi.responses import StreamingResponse
+import json
 import os
 from typing import List
 from pydantic import BaseModel
 from processors.classifier import ZeroShotClassifier
+from processors.startup import Startup
+from processors import serving
+from processors.instrumentation import metrics_middleware, metrics_response
+from processors.admission import Rejected, admission_middleware, cancel_on_disconnect, rejected_handler
 
 # Pydantic model for the request data
 class RerankRequest(BaseModel):
@@ -13,23 +20,72 @@ class ClassifyRequest(BaseModel):
     queries: List[str]
     classes: List[str]
 
-app = FastAPI()
+startup = Startup(ZeroShotClassifier)
 
-classifier = ZeroShotClassifier()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Weights load in the background so the server can answer readiness probes meanwhile
+    startup.begin()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 async def auth_middleware(request: Request, call_next):
     auth_token = request.headers.get('auth-token')
-    if os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
+    # Readiness probes come from the platform and carry no token
+    if request.url.path != "/ready" and os.getenv('AUTH_TOKEN') and os.getenv('AUTH_TOKEN') != auth_token:
         raise HTTPException(status_code=403, detail="Unauthorized")
     response = await call_next(request)
     return response
 
+# Registered first so auth wraps them and unauthenticated requests are never queued or profiled
+app.middleware('http')(admission_middleware)
+app.middleware('http')(metrics_middleware)
 app.middleware('http')(auth_middleware)
+# Queue full (429 + Retry-After), deadline passed (504) or client gone (499)
+app.exception_handler(Rejected)(rejected_handler)
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    return stream or "application/x-ndjson" in request.headers.get('accept', '')
 
 @app.post("/")
-async def handle_classify_request(request_data: ClassifyRequest):
+async def handle_classify_request(request_data: ClassifyRequest, request: Request, stream: bool = False):
+    classifier = await startup.models()
+    if wants_stream(request, stream):
+        # One NDJSON record per query as soon as it is classified; errors stay inline
+        async def records():
+            async for index, result, scores, pruned, error in classifier.stream_classify(queries=request_data.queries, classes=request_data.classes):
+                yield json.dumps({"index": index, "result": result, "scores": scores, "pruned": pruned, "error": error}) + "\n"
+        return StreamingResponse(records(), media_type="application/x-ndjson")
     try:
-        result, scores = await classifier.process_texts(queries=request_data.queries, classes=request_data.classes)
-        return {"status": "success", "result": result, "scores": scores}
+        result, scores, pruned = await cancel_on_disconnect(request, classifier.process_texts(queries=request_data.queries, classes=request_data.classes))
+        # pruned[i] lists the labels the prefilter skipped for query i (always empty when it is off)
+        return {"status": "success", "result": result, "scores": scores, "pruned": pruned}
+    except Rejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/cache")
+async def handle_cache_stats_request():
+    classifier = await startup.models()
+    return {"status": "success", "result": classifier.cache.stats()}
+
+@app.get("/ready")
+async def handle_ready_request():
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail=startup.error or "Loading models")
+    return {"status": "success"}
+
+@app.get("/startup")
+async def handle_startup_request():
+    return {"status": "success", "result": startup.report()}
+
+@app.get("/serving")
+async def handle_serving_request():
+    # Answered by whichever worker took the connection; shared vs private memory is per worker
+    return {"status": "success", "result": serving.report()}
+
+@app.get("/metrics")
+async def handle_metrics_request():
+    return metrics_response()
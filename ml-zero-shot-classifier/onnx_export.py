@@ -0,0 +1,86 @@
+import os
+import shutil
+import numpy as np
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoModelForSequenceClassification, AutoTokenizer
+
+PARITY_SAMPLES = [
+    ("What is the capital of France?", "Paris is the capital and most populous city of France."),
+    ("Central bank raises interest rates", "The central bank lifted its benchmark rate by a quarter point on Wednesday, citing persistent inflation."),
+    ("Football", "The home side scored twice in the final ten minutes to win the derby."),
+    ("Weather forecast", "Heavy rain and strong winds are expected across the coast through the weekend."),
+]
+
+DEFAULT_TOLERANCES = {"onnx": 1e-3, "onnx-int8": 0.1}
+
+def quantize_directory(source: str, target: str):
+    # Dynamic int8 quantization of every graph; configs and tokenizer files are copied
+    # as-is so the quantized directory loads exactly like the fp32 one.
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    if not os.path.exists(target):
+        os.makedirs(target)
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if name.endswith(".onnx"):
+            quantize_dynamic(path, os.path.join(target, name), weight_type=QuantType.QInt8)
+        elif os.path.isfile(path):
+            shutil.copy(path, os.path.join(target, name))
+
+def _probabilities(logits: torch.Tensor) -> np.ndarray:
+    if logits.shape[-1] == 1:
+        return torch.sigmoid(logits).numpy()
+    return torch.softmax(logits, dim=-1).numpy()
+
+def _parity_logits(task: str, model, tokenizer):
+    if task == "sequence-classification":
+        inputs = tokenizer([query for query, _ in PARITY_SAMPLES], [passage for _, passage in PARITY_SAMPLES], padding=True, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            return model(**inputs).logits
+    # seq2seq: next-token distribution of the first decoding step
+    inputs = tokenizer([passage for _, passage in PARITY_SAMPLES], padding=True, truncation=True, return_token_type_ids=False, return_tensors="pt")
+    decoder_input_ids = torch.full((len(PARITY_SAMPLES), 1), model.config.decoder_start_token_id, dtype=torch.long)
+    with torch.no_grad():
+        return model(**inputs, decoder_input_ids=decoder_input_ids).logits[:, -1, :]
+
+def check_parity(model_path: str, onnx_path: str, task: str, backend: str):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTModelForSequenceClassification
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    if task == "sequence-classification":
+        reference = AutoModelForSequenceClassification.from_pretrained(model_path)
+        candidate = ORTModelForSequenceClassification.from_pretrained(onnx_path)
+    else:
+        reference = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+        candidate = ORTModelForSeq2SeqLM.from_pretrained(onnx_path, use_cache=True)
+    reference.eval()
+
+    expected = _probabilities(_parity_logits(task, reference, tokenizer))
+    actual = _probabilities(_parity_logits(task, candidate, tokenizer))
+    difference = float(np.abs(expected - actual).max())
+    tolerance = float(os.getenv("ONNX_PARITY_TOLERANCE") or DEFAULT_TOLERANCES[backend])
+    print(f"{backend} parity: max probability difference {difference:.6f} (tolerance {tolerance})")
+    if difference > tolerance:
+        raise SystemExit(f"{backend} export of {model_path} diverges from torch: {difference:.6f} > {tolerance}")
+    if expected.shape[-1] > 1 and not np.array_equal(expected.argmax(axis=-1), actual.argmax(axis=-1)):
+        raise SystemExit(f"{backend} export of {model_path} changes the predicted labels")
+
+def export_onnx(model_path: str, task: str, backend: str):
+    """
+    Exports `model_path` to ONNX under `<model_path>/onnx` and, for the "onnx-int8"
+    backend, a dynamically quantized copy under `<model_path>/onnx-int8`, then fails
+    the build if the exported graph does not match the torch outputs.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTModelForSequenceClassification
+    onnx_path = os.path.join(model_path, "onnx")
+    if task == "sequence-classification":
+        ort_model = ORTModelForSequenceClassification.from_pretrained(model_path, export=True)
+    else:
+        # Exports the decoder-with-past graph too, so generation reuses cached key/values
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True, use_cache=True)
+    ort_model.save_pretrained(onnx_path)
+    AutoTokenizer.from_pretrained(model_path).save_pretrained(onnx_path)
+
+    target_path = onnx_path
+    if backend == "onnx-int8":
+        target_path = os.path.join(model_path, "onnx-int8")
+        quantize_directory(onnx_path, target_path)
+    check_parity(model_path, target_path, task, backend)
@@ -1,12 +1,24 @@
 from transformers import pipeline, file_utils
 import os
 import shutil
+from onnx_export import export_onnx
 
 if not os.path.exists("./model"):
     os.makedirs("./model")
 
 model = pipeline("zero-shot-classification", model="MoritzLaurer/deberta-v3-large-zeroshot-v1.1-all-33")
-model.save_pretrained("./model")
+# Safetensors can be memory-mapped at load time instead of unpickled
+model.save_pretrained("./model", safe_serialization=True)
+
+# Small sentence-embedding model for the optional label prefilter (ZERO_SHOT_PREFILTER=true)
+from sentence_transformers import SentenceTransformer
+prefilter = SentenceTransformer(os.getenv("ZERO_SHOT_PREFILTER_MODEL") or "sentence-transformers/all-MiniLM-L6-v2")
+prefilter.save("./model/prefilter", safe_serialization=True)
+
+# Export the ONNX graph (and its int8 variant) the runtime backend will load
+backend = os.getenv("INFERENCE_BACKEND") or "torch"
+if backend != "torch":
+    export_onnx("./model", "sequence-classification", backend)
 
 # Get the default cache directory path
 cache_path = file_utils.default_cache_path
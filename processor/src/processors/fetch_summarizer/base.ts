@@ -20,8 +20,8 @@ function extractUrls(text: string): string[] {
 }
 
 export abstract class FetchSummarizer {
-  async fetchArticles(tweets: Tweet[]): Promise<StringOrNull[]> {
-    const urls = await Promise.all(
+  async resolveArticleUrls(tweets: Tweet[]): Promise<StringOrNull[]> {
+    return Promise.all(
       tweets.map(async (tweet) => {
         if (!_.isEmpty(tweet.article_summary)) {
           return null;
@@ -39,7 +39,10 @@ export abstract class FetchSummarizer {
         return actualUrls[0] ?? null;
       }),
     );
+  }
 
+  async fetchArticles(tweets: Tweet[]): Promise<StringOrNull[]> {
+    const urls = await this.resolveArticleUrls(tweets);
     return callerInstance.fetchArticles(urls);
   }
   abstract summarizeTweetArticles(tweets: Tweet[]): Promise<StringOrNull[]>;
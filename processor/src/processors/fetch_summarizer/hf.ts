@@ -4,25 +4,23 @@ import { FetchSummarizer, StringOrNull } from "./base.js";
 
 export class TransformersFetchSummarizer extends FetchSummarizer {
   async summarizeTweetArticles(tweets: Tweet[]): Promise<StringOrNull[]> {
-    const articles = await this.fetchArticles(tweets);
+    const urls = await this.resolveArticleUrls(tweets);
+    // ml-pipeline fetches and summarizes in one hop when it is deployed
+    const summaries = await callerInstance.fetchAndSummarizeArticles(urls);
+    if (summaries !== null) {
+      return summaries;
+    }
+    const articles = await callerInstance.fetchArticles(urls);
     return this.batchedSendRequest(articles);
   }
 
-  async batchedSendRequest(texts: StringOrNull[], batchSize: number = 10) {
+  async batchedSendRequest(texts: StringOrNull[], batchSize: number = 32) {
     const summarizedTexts: StringOrNull[] = [];
+    // One /batch request per slice: the summarizer sorts every slice's chunks by length
+    // and generates them in padded batches instead of one article per call
     for (let i = 0; i < texts.length; i += batchSize) {
       const batch = texts.slice(i, i + batchSize);
-      const results = await Promise.all(
-        batch.map(async (text) => {
-          if (text === null) {
-            return null;
-          }
-          console.log({ text });
-          const summarized = await callerInstance.summarizeText(text);
-          console.log({ summarized });
-          return summarized;
-        }),
-      );
+      const results = await callerInstance.summarizeTexts(batch);
       summarizedTexts.push(...results);
     }
 
@@ -16,5 +16,6 @@ export abstract class BaseServiceCaller {
   ): Promise<Tweet[]>;
   abstract scrapeTweets(): Promise<Tweet[]>;
   abstract summarizeText(text: string): Promise<string>;
+  abstract summarizeTexts(texts: (string | null)[]): Promise<(string | null)[]>;
   abstract fetchArticles(urls: string[]): Promise<(string | null)[]>;
 }
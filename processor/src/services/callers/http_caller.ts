@@ -17,13 +17,19 @@ export class HttpServiceCaller extends BaseServiceCaller {
   mlUrl?: URL;
 
   private buildConfig() {
-    const postCfg: AxiosRequestConfig = {};
+    // Harvest processing is bulk work: the ML services let interactive calls go first
+    const postCfg: AxiosRequestConfig = {
+      headers: {
+        "x-priority": "bulk",
+      },
+    };
 
     if (
       !_.isNil(process.env.AUTH_TOKEN) &&
       (process.env.AUTH_TOKEN as string).length > 0
     ) {
       postCfg.headers = {
+        ...postCfg.headers,
         "auth-token": process.env.AUTH_TOKEN,
       };
     }
@@ -147,6 +153,61 @@ export class HttpServiceCaller extends BaseServiceCaller {
     }
   }
 
+  async summarizeTexts(texts: (string | null)[]) {
+    try {
+      // Served next to "/" on the summarizer, e.g. http://ml-summarizer:8000/batch
+      const {
+        data: { result, error },
+      }: { data: { result: (string | null)[]; error: (string | null)[] } } =
+        await axios.post(
+          new URL("batch", getServicesUrl("summarizer")).toString(),
+          {
+            texts,
+          },
+          this.buildConfig(),
+        );
+
+      // Texts that failed to summarize come back as null; the rest of the batch still counts
+      error.forEach((message) => {
+        if (message !== null) {
+          console.error(message);
+        }
+      });
+      return result;
+    } catch (error) {
+      console.error(error);
+      throw error;
+    }
+  }
+
+  async fetchAndSummarizeArticles(
+    urls: (string | null)[],
+  ): Promise<(string | null)[] | null> {
+    let pipelineUrl: string;
+    try {
+      pipelineUrl = getServicesUrl("pipeline");
+    } catch (error) {
+      return null;
+    }
+
+    try {
+      const {
+        data: { result },
+      }: { data: { result: (string | null)[] } } = await axios.post(
+        pipelineUrl,
+        {
+          urls,
+        },
+        this.buildConfig(),
+      );
+
+      return result;
+    } catch (error) {
+      console.error(error);
+      throw error;
+    }
+  }
+
   async fetchArticles(urls: (string | null)[]) {
     try {
       const {
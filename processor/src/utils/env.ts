@@ -8,6 +8,7 @@ const services = {
   "zero-shot-classifier": process.env.ZERO_SHOT_CLASSIFIER_ENDPOINT,
   summarizer: process.env.SUMMARIZER_ENDPOINT,
   reranker: process.env.RERANKER_ENDPOINT,
+  pipeline: process.env.PIPELINE_ENDPOINT,
 };
 
 export function getServicesUrl(service: keyof typeof services) {
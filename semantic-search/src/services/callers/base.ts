@@ -2,5 +2,6 @@ export abstract class BaseServiceCaller {
   abstract crossEncoderRerank(
     basePassage: string,
     passages: string[],
+    topK?: number,
   ): Promise<number[]>;
 }
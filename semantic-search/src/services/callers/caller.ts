@@ -9,12 +9,14 @@ dotenv.config();
 interface RerankRequest {
   base_passage: string;
   queries: string[];
+  top_k?: number;
 }
 
 export class HttpServiceCaller extends BaseServiceCaller {
   async crossEncoderRerank(
     basePassage: string,
     queries: string[],
+    topK?: number,
   ): Promise<number[]> {
     let rerankerUrl: string;
     try {
@@ -26,16 +28,23 @@ export class HttpServiceCaller extends BaseServiceCaller {
     const requestData: RerankRequest = {
       base_passage: basePassage,
       queries: queries,
+      top_k: topK,
     };
 
     try {
-      const postCfg: AxiosRequestConfig = {};
+      // Search results are waited on by a user, so they overtake bulk harvest work
+      const postCfg: AxiosRequestConfig = {
+        headers: {
+          "x-priority": "interactive",
+        },
+      };
 
       if (
         !_.isNil(process.env.AUTH_TOKEN) &&
         (process.env.AUTH_TOKEN as string).length > 0
       ) {
         postCfg.headers = {
+          ...postCfg.headers,
           "auth-token": process.env.AUTH_TOKEN,
         };
       }
@@ -36,6 +36,7 @@ export class SearchEngine {
     const reranked = await caller.crossEncoderRerank(
       query,
       summaries.map((summary) => summary.text),
+      offset + limit,
     );
     const rerankedSummaries = reranked.map((idx) => summaries[idx]);
 